@@ -1,3 +1,48 @@
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from store.carts import SESSION_KEY
+from store.models import Brand, Cart, CartItem, Category, Product
 
-# Create your tests here.
+
+class LoginCartMergeTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        brand = Brand.objects.create(name='Samsung', slug='samsung')
+        category = Category.objects.create(name='Phones', slug='phones')
+        cls.products = [
+            Product.objects.create(
+                name=f'Galaxy {i}', slug=f'galaxy-{i}', brand=brand, category=category,
+                description='Phone', price=Decimal('1000'), image='products/p.jpg',
+            )
+            for i in range(40)
+        ]
+        cls.user = User.objects.create_user('shopper', password='secret-pass-1')
+
+    def login_with_guest_cart(self, size):
+        """Log in with `size` guest lines, half of them already in the user's cart; returns queries run"""
+        Cart.objects.filter(user=self.user).delete()
+        cart = Cart.objects.create(user=self.user)
+        CartItem.objects.bulk_create([CartItem(cart=cart, product=product) for product in self.products[:size // 2]])
+
+        client = APIClient()
+        session = client.session
+        session[SESSION_KEY] = [[i, product.id, None, None, 2] for i, product in enumerate(self.products[:size], 1)]
+        session.save()
+        client.cookies['sessionid'] = session.session_key
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.post('/api/auth/login/', {'username': 'shopper', 'password': 'secret-pass-1'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            sorted(cart.items.values_list('quantity', flat=True)), [2] * (size - size // 2) + [3] * (size // 2)
+        )
+        return len(queries)
+
+    def test_merge_query_count_is_constant(self):
+        self.login_with_guest_cart(2)  # first login also creates the token
+        self.assertEqual(self.login_with_guest_cart(4), self.login_with_guest_cart(40))
@@ -7,13 +7,15 @@ from rest_framework.authentication import TokenAuthentication
 from rest_framework.authtoken.models import Token
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.models import User
+from django.db import transaction
 from .serializers import (
     UserSerializer,
     RegisterSerializer,
     LoginSerializer,
     ChangePasswordSerializer
 )
-from store.models import Cart, CartItem
+from store.carts import GuestCart
+from store.models import Cart
 from store.utils import (
     LoginRateThrottle, 
     RegistrationRateThrottle, 
@@ -123,28 +125,15 @@ class LoginView(APIView):
                 'error': {'message': 'Invalid credentials'}
             }, status=status.HTTP_401_UNAUTHORIZED)
         
-        # Merge guest cart into user cart before login
-        session_key = request.session.session_key
-        if session_key:
-            try:
-                guest_cart = Cart.objects.filter(session_key=session_key, user=None).first()
-                if guest_cart and guest_cart.items.exists():
+        # Merge guest cart into user cart before login (a fixed number of set-based queries)
+        try:
+            guest_cart = GuestCart(request.session)
+            if guest_cart.lines:
+                with transaction.atomic():
                     user_cart, _ = Cart.objects.get_or_create(user=user)
-                    for item in guest_cart.items.all():
-                        existing_item = user_cart.items.filter(
-                            product=item.product,
-                            variant=item.variant,
-                            education_tablet=item.education_tablet
-                        ).first()
-                        if existing_item:
-                            existing_item.quantity += item.quantity
-                            existing_item.save()
-                        else:
-                            item.cart = user_cart
-                            item.save()
-                    guest_cart.delete()
-            except Exception as e:
-                logger.error(f"Error merging cart: {e}")
+                    guest_cart.materialize(user_cart)
+        except Exception as e:
+            logger.error(f"Error merging cart: {e}")
         
         login(request, user)
         token, _ = Token.objects.get_or_create(user=user)
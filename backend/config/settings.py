@@ -3,8 +3,10 @@ Django settings for TepStore project.
 """
 
 from pathlib import Path
+import django
 from dotenv import load_dotenv
 import os
+import sys
 
 # Load .env file and override any existing environment variables
 load_dotenv(override=True)
@@ -17,6 +19,8 @@ pymysql.install_as_MySQLdb()
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+TESTING = sys.argv[1:2] == ['test']
+
 SECRET_KEY = os.getenv('SECRET_KEY', 'django-insecure-change-this-in-production')
 
 DEBUG = os.getenv('DEBUG', 'True') == 'True'
@@ -89,6 +93,45 @@ else:
             'NAME': BASE_DIR / 'db.sqlite3',
         }
     }
+    if TESTING:
+        # The concurrency tests run requests from several threads: they need a
+        # file rather than the in-memory test database, and transactions that
+        # take the write lock when they start, so they wait for each other
+        # instead of failing with "database is locked" (Django 5.1+)
+        DATABASES['default']['TEST'] = {'NAME': BASE_DIR / 'test_db.sqlite3'}
+        if django.VERSION >= (5, 1):
+            DATABASES['default']['OPTIONS'] = {'transaction_mode': 'IMMEDIATE'}
+
+# Cache - shared by every server worker and management command. Cached
+# catalog responses, ETag validators and the in-process suggest index are
+# invalidated through generation counters stored here, so the cache must not
+# be per-process memory. Redis when REDIS_URL is set, otherwise a database
+# table (created by migrate). TIMEOUT None keeps the counters from expiring
+# when the database cache rewrites them on incr; every other entry passes
+# its own timeout.
+if TESTING:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+elif os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+            'TIMEOUT': None,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'store_cache',
+            'TIMEOUT': None,
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+    }
 
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
@@ -133,6 +176,7 @@ CORS_ALLOW_HEADERS = [
     'accept-encoding',
     'authorization',
     'content-type',
+    'idempotency-key',
     'origin',
     'x-csrftoken',
     'x-requested-with',
@@ -12,7 +12,7 @@ from .models import (
     EnterpriseBundle, EnterpriseOrder,
     EducationBoard, ClassroomPackage, Fundraiser, DonationAmount, Donation,
     EducationTablet, TabletSoftware, SchoolTabletOrder, SchoolTabletOrderItem,
-    Cart, CartItem, Order, OrderItem, HeroSlide, TradeInRequest, Employer, Bank, School, Policy
+    Cart, CartItem, Order, OrderItem, StockReservation, HeroSlide, TradeInRequest, Employer, Bank, School, Policy
 )
 
 
@@ -483,6 +483,10 @@ class CartAdmin(admin.ModelAdmin):
     list_display = ['cart_id', 'user', 'item_count', 'total', 'created_at']
     readonly_fields = ['cart_id']
     inlines = [CartItemInline]
+    
+    def get_queryset(self, request):
+        # Totals come from one grouped query instead of two item queries per row
+        return super().get_queryset(request).select_related('user').with_totals()
 
 
 class OrderItemInline(admin.TabularInline):
@@ -500,6 +504,23 @@ class OrderAdmin(admin.ModelAdmin):
     inlines = [OrderItemInline]
 
 
+@admin.register(StockReservation)
+class StockReservationAdmin(admin.ModelAdmin):
+    """Read-only: holds have already been taken off stock, so they are only changed by store.inventory"""
+    list_display = ['holder', 'product', 'variant', 'education_tablet', 'quantity', 'expires_at']
+    list_select_related = ['product', 'variant', 'education_tablet']
+    search_fields = ['holder']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
 # ============================================================================
 #                           TRADE-IN REQUESTS
 # ============================================================================
@@ -0,0 +1,184 @@
+"""
+Structured product attributes.
+
+Specifications and descriptions are free text ("RAM: 4GB / Storage: 64GB,
+128GB / Chipset: ..."), and variants carry free-form storage/ram/color
+strings. parse_attributes() turns them into ProductAttribute rows:
+
+- one text row per "Key: value" pair, e.g. ("ram", "4gb")
+- numeric rows in a fixed unit for well-known attributes, e.g.
+  ("ram_gb", "4", 4) and ("storage_gb", "64", 64), ("storage_gb", "128", 128)
+
+AttributeFilter exposes the numeric keys (and color) as list filters:
+`?ram_gb__gte=8&storage_gb=256&color=black`.
+"""
+
+import re
+from decimal import Decimal, InvalidOperation
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+from .models import ProductAttribute, ProductVariant
+from .search import HTML_TAG_RE
+
+VALUE_MAX_LENGTH = 100
+KEY_MAX_LENGTH = 50
+
+SPEC_KEY = r"[A-Za-z][A-Za-z0-9 ()_-]{0,40}?"
+# "Key: value" up to the next "Key:" (after , ; / | or newline), a newline or the end.
+# Also copes with specs saved as a dict repr ("{'RAM': '12GB', ...}").
+SPEC_PAIR_RE = re.compile(
+    rf"""(?<![A-Za-z0-9])(?P<key>{SPEC_KEY})['"]?\s*:\s*['"]?(?P<value>[^\n]+?)['"]?\s*"""
+    rf"""(?=[,;/|]\s*['"]?{SPEC_KEY}['"]?\s*:|[\n}}]|$)"""
+)
+
+# Spec key spellings -> canonical key
+KEY_ALIASES = {
+    'memory': 'ram',
+    'internal_storage': 'storage',
+    'internal_memory': 'storage',
+    'rom': 'storage',
+    'capacity': 'storage',
+    'screen': 'display',
+    'screen_size': 'display',
+    'main_camera': 'camera',
+    'rear_camera': 'camera',
+    'colour': 'color',
+}
+
+SIZE_RE = re.compile(r'(\d+(?:\.\d+)?)\s*(tb|gb|mb)\b')
+SIZE_TO_GB = {'tb': Decimal(1024), 'gb': Decimal(1), 'mb': Decimal(1) / 1024}
+
+
+# Where a storage value goes on to describe a memory card ("128GB (expandable up to 1TB via microSD)")
+EXPANSION_RE = re.compile(r'expand|extend|up to|micro\s*sd|sd\s*card')
+
+
+def _sizes_gb(text):
+    return [Decimal(number) * SIZE_TO_GB[unit] for number, unit in SIZE_RE.findall(text)]
+
+
+def _storage_sizes_gb(text):
+    """Built-in storage sizes only: a card slot's maximum is not a storage option"""
+    return _sizes_gb(EXPANSION_RE.split(text, 1)[0])
+
+
+def _numbers_before(unit_pattern):
+    pattern = re.compile(rf'(\d+(?:\.\d+)?)\s*{unit_pattern}')
+    return lambda text: [Decimal(number) for number in pattern.findall(text)]
+
+
+# Numeric attribute -> (canonical text key it is read from, value parser)
+NUMERIC_ATTRIBUTES = {
+    'ram_gb': ('ram', _sizes_gb),
+    'storage_gb': ('storage', _storage_sizes_gb),
+    'battery_mah': ('battery', _numbers_before(r'mah\b')),
+    'display_in': ('display', _numbers_before(r'(?:"|”|\'\'|-?inch|in\b)')),
+    'camera_mp': ('camera', _numbers_before(r'mp\b')),
+}
+
+# Query params accepted by AttributeFilter
+TEXT_FILTERS = {'color'}
+NUMERIC_LOOKUPS = {'gte', 'lte', 'gt', 'lt'}
+
+
+def normalize_key(key):
+    key = re.sub(r'[^a-z0-9]+', '_', key.lower()).strip('_')[:KEY_MAX_LENGTH]
+    return KEY_ALIASES.get(key, key)
+
+
+def normalize_value(value):
+    return ' '.join(HTML_TAG_RE.sub(' ', value).lower().split())[:VALUE_MAX_LENGTH]
+
+
+def format_number(number):
+    return format(number.normalize(), 'f')
+
+
+def parse_pairs(text):
+    """Yield (canonical key, normalized value) for every "Key: value" in text."""
+    for match in SPEC_PAIR_RE.finditer(HTML_TAG_RE.sub('\n', text or '')):
+        key, value = normalize_key(match.group('key')), normalize_value(match.group('value'))
+        if key and value:
+            yield key, value
+
+
+def parse_attributes(product, variants=()):
+    """Return the set of (key, value, numeric_value) rows for a product and its variants."""
+    pairs = list(parse_pairs(product.specifications)) + list(parse_pairs(product.description))
+    for variant in variants:
+        for key in ('storage', 'ram', 'color'):
+            value = normalize_value(getattr(variant, key))
+            if value:
+                pairs.append((key, value))
+
+    rows = set()
+    for key, value in pairs:
+        rows.add((key, value, None))
+        for numeric_key, (source, parse) in NUMERIC_ATTRIBUTES.items():
+            if key == source:
+                for number in parse(value):
+                    rows.add((numeric_key, format_number(number), number.quantize(Decimal('0.01'))))
+    return rows
+
+
+def _attribute_rows(product, variants):
+    return [
+        ProductAttribute(product=product, key=key, value=value, numeric_value=numeric_value)
+        for key, value, numeric_value in parse_attributes(product, variants)
+    ]
+
+
+def index_product_attributes(product):
+    """Replace the attribute rows of a single product."""
+    with transaction.atomic():
+        ProductAttribute.objects.filter(product=product).delete()
+        ProductAttribute.objects.bulk_create(_attribute_rows(product, product.variants.all()))
+
+
+def index_attributes(queryset, batch_size=500):
+    """Rebuild attribute rows for every product in queryset. Returns products indexed."""
+    queryset = queryset.only('id', 'specifications', 'description').order_by('pk')
+    indexed = 0
+    last_pk = 0
+    while True:
+        batch = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            break
+        variants = {}
+        for variant in ProductVariant.objects.filter(product__in=batch).only('product', 'storage', 'ram', 'color'):
+            variants.setdefault(variant.product_id, []).append(variant)
+        with transaction.atomic():
+            ProductAttribute.objects.filter(product__in=batch).delete()
+            ProductAttribute.objects.bulk_create([
+                row for product in batch for row in _attribute_rows(product, variants.get(product.pk, []))
+            ], batch_size=1000)
+        indexed += len(batch)
+        last_pk = batch[-1].pk
+    return indexed
+
+
+class AttributeFilter(BaseFilterBackend):
+    """
+    Filter products on parsed attributes: `?<numeric key>[__gte|__lte|__gt|__lt]=n`
+    for the keys in NUMERIC_ATTRIBUTES (e.g. `?ram_gb__gte=8&storage_gb=256`)
+    and `?color=` for a normalized text match.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        for param, raw_value in request.query_params.items():
+            key, _, lookup = param.partition('__')
+            if key in TEXT_FILTERS and not lookup:
+                matches = ProductAttribute.objects.filter(key=key, value=normalize_value(raw_value))
+            elif key in NUMERIC_ATTRIBUTES and (not lookup or lookup in NUMERIC_LOOKUPS):
+                try:
+                    number = Decimal(raw_value)
+                except InvalidOperation:
+                    number = None
+                if number is None or not number.is_finite():
+                    raise ValidationError({param: 'A number is required.'})
+                matches = ProductAttribute.objects.filter(key=key, **{f'numeric_value__{lookup or "exact"}': number})
+            else:
+                continue
+            queryset = queryset.filter(pk__in=matches.values('product'))
+        return queryset
@@ -0,0 +1,181 @@
+"""
+Cache helpers for the store app.
+
+Cached payloads are keyed on per-model *generation* counters. Saving or
+deleting a model instance bumps its counter (see store.signals), which
+changes every key derived from it, so stale entries are simply never read
+again and expire on their own.
+"""
+
+import hashlib
+import time
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+GENERATION_KEY = 'store:generation:{}'
+
+
+def _generation_key(model):
+    return GENERATION_KEY.format(model._meta.label_lower)
+
+
+def get_generations(models):
+    """Current generation counters of model classes, read in one cache round trip."""
+    keys = [_generation_key(model) for model in models]
+    generations = cache.get_many(keys)
+    for key in keys:
+        if key not in generations:
+            # Seed from the clock so an evicted counter never reuses an old value
+            cache.add(key, int(time.time() * 1000), None)
+            generations[key] = cache.get(key)
+    return [generations[key] for key in keys]
+
+
+def get_generation(model):
+    """Current generation counter of a model class."""
+    return get_generations([model])[0]
+
+
+def bump_generation(model):
+    """
+    Invalidate every cache entry derived from model. incr is atomic on Redis
+    and locmem; the database cache emulates it with a read and a write, so two
+    simultaneous bumps may yield one new value, which still invalidates both.
+    """
+    key = _generation_key(model)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, int(time.time() * 1000), None)
+
+
+def _cache_key(prefix, generations, params):
+    digest = ''
+    if params:
+        normalized = '&'.join(f'{k}={v}' for k, v in sorted(params))
+        digest = hashlib.md5(normalized.encode()).hexdigest()
+    return f'store:{prefix}:{generations}:{digest}'
+
+
+def make_cache_key(prefix, models, params=None):
+    """Build a cache key from a prefix, model generations and request parameters."""
+    return _cache_key(prefix, '.'.join(str(generation) for generation in get_generations(models)), params)
+
+
+class CachedResponseMixin:
+    """
+    Cache anonymous list/retrieve responses of read-only viewsets.
+
+    The key is built from host, path, normalized query params and the
+    generation of every model in `cache_models`, so a write to any of them
+    invalidates the cached bodies at once; `cache_timeout` only bounds how
+    long unreachable entries linger.
+    """
+    cache_models = ()
+    cache_timeout = 60 * 60 * 24
+
+    def get_response_cache_key(self, request):
+        params = [(key, value) for key in request.query_params for value in request.query_params.getlist(key)]
+        # Host is part of the key because serialized image URLs are absolute
+        prefix = f'response:{request.get_host()}{request.path}'
+        return make_cache_key(prefix, self.cache_models, params)
+
+    def cached_response(self, request, build_response):
+        if request.user.is_authenticated or not self.cache_models:
+            return build_response()
+        cache_key = self.get_response_cache_key(request)
+        data = cache.get(cache_key)
+        if data is not None:
+            return Response(data)
+        response = build_response()
+        if response.status_code == 200:
+            cache.set(cache_key, response.data, self.cache_timeout)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(request, lambda: super(CachedResponseMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(request, lambda: super(CachedResponseMixin, self).retrieve(request, *args, **kwargs))
+
+
+class ConditionalGetMixin:
+    """
+    ETag / Last-Modified support for list and retrieve.
+
+    The validator is MAX(`last_modified_field`) plus the row count of the
+    filtered queryset (one aggregate query), combined with the generations
+    of `cache_models` when the view declares them, so edits to nested
+    objects (variants, images, ...) change the ETag too. A matching
+    If-None-Match / If-Modified-Since returns 304 before any serializer
+    runs. Last-Modified is only sent when the row timestamp alone covers
+    the response, i.e. the view has no related `cache_models`. Models
+    without a timestamp set `last_modified_field = None` and rely on the
+    count and their generation.
+    """
+    last_modified_field = 'updated_at'
+    validators_timeout = 60 * 60 * 24
+
+    def get_validator_queryset(self, detail):
+        queryset = self.filter_queryset(self.get_queryset())
+        if detail:
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            queryset = queryset.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        return queryset
+
+    def compute_validators(self, request, detail):
+        aggregates = {'count': Count('pk')}
+        if self.last_modified_field:
+            aggregates['last_modified'] = Max(self.last_modified_field)
+        summary = self.get_validator_queryset(detail).order_by().aggregate(**aggregates)
+        return summary['count'], summary.get('last_modified')
+
+    def get_validators(self, request, detail):
+        """Return (etag, last_modified) for the current request."""
+        cache_models = getattr(self, 'cache_models', ())
+        related_models = [model for model in cache_models if model is not self.get_queryset().model]
+        params = [(key, value) for key in request.query_params for value in request.query_params.getlist(key)]
+
+        generations = '.'.join(str(generation) for generation in get_generations(cache_models))
+        if cache_models:
+            # Validators only change when a generation does, so they can be cached too
+            cache_key = _cache_key(f'validators:{request.path}', generations, params)
+            validators = cache.get(cache_key)
+            if validators is None:
+                validators = self.compute_validators(request, detail)
+                cache.set(cache_key, validators, self.validators_timeout)
+        else:
+            validators = self.compute_validators(request, detail)
+        count, last_modified = validators
+
+        normalized = '&'.join(f'{k}={v}' for k, v in sorted(params))
+        stamp = last_modified.isoformat() if last_modified else ''
+        etag = hashlib.md5(f'{request.path}?{normalized}|{count}|{stamp}|{generations}'.encode()).hexdigest()
+        if related_models or last_modified is None:
+            last_modified = None
+        return quote_etag(etag), last_modified
+
+    def conditional_response(self, request, build_response, detail=False):
+        etag, last_modified = self.get_validators(request, detail)
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        not_modified = get_conditional_response(request._request, etag=etag, last_modified=timestamp)
+        if not_modified is not None:
+            not_modified['ETag'] = etag
+            return not_modified
+        response = build_response()
+        if response.status_code == 200:
+            response['ETag'] = etag
+            if timestamp is not None:
+                response['Last-Modified'] = http_date(timestamp)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(request, lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            request, lambda: super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs), detail=True
+        )
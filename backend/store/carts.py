@@ -0,0 +1,253 @@
+"""
+Session-backed carts for anonymous visitors.
+
+A guest's cart lives in their session as compact
+[line id, product id, variant id, tablet id, quantity] rows instead of a
+Cart row, so browsing (or a bot hitting /api/cart/) writes nothing: the
+session itself is only saved once it holds something. A Cart row is only
+materialized when the guest logs in (merged into the user's cart); at
+checkout the priced lines go straight into the order.
+
+The line id stands in for CartItem.id in responses and in
+/api/cart/items/<id>/, so clients treat guest and user carts the same.
+
+apply_operations() runs a batch of add/set/remove steps (/api/cart/bulk/)
+against either kind of cart.
+"""
+
+from django.db import IntegrityError, transaction
+from rest_framework.exceptions import ValidationError
+from .models import CART_LINE_ATTEMPTS, Cart, CartItem, EducationTablet, Product, ProductVariant
+
+SESSION_KEY = 'cart'
+LINE_ID, PRODUCT, VARIANT, TABLET, QUANTITY = range(5)
+
+
+class GuestCart:
+    """A Cart look-alike (items, total, item_count) for GuestCartSerializer"""
+    id = None
+    cart_id = None
+
+    def __init__(self, session):
+        self.session = session
+        if SESSION_KEY not in session and session.session_key:
+            self._adopt_cart_row()
+        self.lines = [list(line) for line in session.get(SESSION_KEY, [])]
+        self._items = None
+
+    def _adopt_cart_row(self):
+        # Guest carts created before carts moved into the session
+        cart = Cart.objects.filter(session_key=self.session.session_key, user=None).first()
+        if cart is None:
+            return
+        rows = cart.items.order_by('pk').values_list('product', 'variant', 'education_tablet', 'quantity')
+        self.session[SESSION_KEY] = [[line_id, *row] for line_id, row in enumerate(rows, start=1)]
+        cart.delete()
+
+    def _save(self):
+        self._items = None
+        if self.lines or SESSION_KEY in self.session:
+            self.session[SESSION_KEY] = self.lines
+
+    def _line(self, line_id):
+        return next((line for line in self.lines if line[LINE_ID] == line_id), None)
+
+    def add(self, product_id=None, variant_id=None, tablet_id=None, quantity=1):
+        key = [product_id, variant_id, tablet_id]
+        for line in self.lines:
+            if line[PRODUCT:QUANTITY] == key:
+                line[QUANTITY] += quantity
+                break
+        else:
+            line_id = max((line[LINE_ID] for line in self.lines), default=0) + 1
+            self.lines.append([line_id, *key, quantity])
+        self._save()
+
+    def set_quantity(self, line_id, quantity):
+        """Change (or with quantity <= 0, remove) a line. Returns False if there is no such line."""
+        line = self._line(line_id)
+        if line is None:
+            return False
+        if quantity <= 0:
+            self.lines.remove(line)
+        else:
+            line[QUANTITY] = quantity
+        self._save()
+        return True
+
+    def remove(self, line_id):
+        return self.set_quantity(line_id, 0)
+
+    def clear(self):
+        self.lines = []
+        self._save()
+
+    @property
+    def items(self):
+        """Unsaved CartItems priced like CartItem.objects.with_prices(); lines of deleted items are dropped"""
+        if self._items is None:
+            self._items = self._load_items()
+        return self._items
+
+    def _load_items(self):
+        products = Product.objects.select_related('brand', 'category').in_bulk(
+            {line[PRODUCT] for line in self.lines if line[PRODUCT]}
+        )
+        variants = ProductVariant.objects.in_bulk({line[VARIANT] for line in self.lines if line[VARIANT]})
+        tablets = EducationTablet.objects.in_bulk({line[TABLET] for line in self.lines if line[TABLET]})
+
+        items = []
+        for line_id, product_id, variant_id, tablet_id, quantity in self.lines:
+            product, variant, tablet = products.get(product_id), variants.get(variant_id), tablets.get(tablet_id)
+            missing = (product_id and not product) or (variant_id and not variant) or (tablet_id and not tablet)
+            if missing or not (product or tablet):
+                continue
+            item = CartItem(id=line_id, product=product, variant=variant, education_tablet=tablet, quantity=quantity)
+            # Same precedence as models.cart_unit_price()
+            if tablet:
+                item.line_unit_price = tablet.price
+            elif variant:
+                item.line_unit_price = variant.final_price
+            else:
+                item.line_unit_price = product.effective_price
+            item.line_total = item.line_unit_price * quantity
+            items.append(item)
+        return items
+
+    @property
+    def total(self):
+        return sum((item.line_total for item in self.items), 0)
+
+    @property
+    def item_count(self):
+        return sum(item.quantity for item in self.items)
+
+    def _live_lines(self):
+        """Lines whose product, variant and tablet still exist, checked with pk-only queries"""
+        live = {}
+        for column, model in ((PRODUCT, Product), (VARIANT, ProductVariant), (TABLET, EducationTablet)):
+            ids = {line[column] for line in self.lines if line[column]}
+            live[column] = set(model.objects.filter(pk__in=ids).order_by().values_list('pk', flat=True) if ids else ())
+        return [
+            line for line in self.lines
+            if (line[PRODUCT] or line[TABLET]) and all(line[column] in live[column] for column in live if line[column])
+        ]
+
+    @staticmethod
+    def _merge_lines(cart, lines):
+        with transaction.atomic():
+            existing = {item.line_key: item for item in cart.items.select_for_update()}
+            updated, created = [], []
+            for _, product_id, variant_id, tablet_id, quantity in lines:
+                item = existing.get(CartItem.make_line_key(product_id, variant_id, tablet_id))
+                if item is not None:
+                    item.quantity += quantity
+                    updated.append(item)
+                else:
+                    created.append(CartItem(
+                        cart=cart, product_id=product_id, variant_id=variant_id, education_tablet_id=tablet_id,
+                        quantity=quantity,
+                    ))
+            CartItem.objects.bulk_update(updated, ['quantity'])
+            CartItem.objects.bulk_create(created)
+
+    def materialize(self, cart):
+        """
+        Merge the lines into a saved Cart (at login) and empty the guest cart.
+        Lines the cart already has get one bulk UPDATE, the rest one bulk
+        INSERT, so the query count does not grow with either cart's size.
+        """
+        lines = self._live_lines()
+        for attempt in range(CART_LINE_ATTEMPTS):
+            try:
+                self._merge_lines(cart, lines)
+                break
+            except IntegrityError:
+                # A concurrent request added one of the lines first
+                if attempt == CART_LINE_ATTEMPTS - 1:
+                    raise
+        self.clear()
+        return cart
+
+
+ADD_TARGETS = [('product_id', Product), ('variant_id', ProductVariant), ('education_tablet_id', EducationTablet)]
+
+
+def _check_operations(operations, line_ids):
+    """Reject the whole batch if it adds unknown items or touches lines that are not (or no longer) in the cart"""
+    for field, model in ADD_TARGETS:
+        ids = {op[field] for op in operations if op['op'] == 'add' and op.get(field)}
+        missing = ids - set(model.objects.filter(pk__in=ids).order_by().values_list('pk', flat=True)) if ids else set()
+        if missing:
+            raise ValidationError({field: f'Unknown id(s): {", ".join(map(str, sorted(missing)))}'})
+
+    live = set(line_ids)
+    for index, op in enumerate(operations):
+        if op['op'] == 'add':
+            continue
+        if op['item_id'] not in live:
+            raise ValidationError({'operations': {index: {'item_id': 'Not in the cart.'}}})
+        if op['op'] == 'remove' or op['quantity'] == 0:
+            live.discard(op['item_id'])
+
+
+def _apply_to_guest_cart(cart, operations):
+    _check_operations(operations, [line[LINE_ID] for line in cart.lines])
+    for op in operations:
+        if op['op'] == 'add':
+            cart.add(op.get('product_id'), op.get('variant_id'), op.get('education_tablet_id'), op['quantity'])
+        else:
+            cart.set_quantity(op['item_id'], 0 if op['op'] == 'remove' else op['quantity'])
+
+
+def _apply_to_cart(cart, operations):
+    with transaction.atomic():
+        items = {item.pk: item for item in cart.items.select_for_update()}
+        _check_operations(operations, items)
+        by_key = {item.line_key: item for item in items.values()}
+        changed, removed, created = set(), set(), []
+        for op in operations:
+            if op['op'] == 'add':
+                key = CartItem.make_line_key(op.get('product_id'), op.get('variant_id'), op.get('education_tablet_id'))
+                item = by_key.get(key)
+                if item is None:
+                    item = by_key[key] = CartItem(
+                        cart=cart, product_id=op.get('product_id'), variant_id=op.get('variant_id'),
+                        education_tablet_id=op.get('education_tablet_id'), quantity=0,
+                    )
+                    created.append(item)
+                item.quantity += op['quantity']
+                if item.pk:
+                    changed.add(item.pk)
+                continue
+
+            item = items[op['item_id']]
+            if op['op'] == 'remove' or op['quantity'] == 0:
+                removed.add(item.pk)
+                del by_key[item.line_key]
+            else:
+                item.quantity = op['quantity']
+                changed.add(item.pk)
+
+        if removed:
+            CartItem.objects.filter(pk__in=removed).delete()
+        CartItem.objects.bulk_update([items[pk] for pk in changed - removed], ['quantity'])
+        CartItem.objects.bulk_create(created)
+
+
+def apply_operations(cart, operations):
+    """
+    Apply validated CartOperationSerializer steps in order. For a Cart the
+    net result is written with one delete, one bulk update and one bulk
+    insert in a single transaction, retried if a concurrent request created
+    one of the new lines first.
+    """
+    if isinstance(cart, GuestCart):
+        return _apply_to_guest_cart(cart, operations)
+
+    for attempt in range(CART_LINE_ATTEMPTS):
+        try:
+            return _apply_to_cart(cart, operations)
+        except IntegrityError:
+            if attempt == CART_LINE_ATTEMPTS - 1:
+                raise
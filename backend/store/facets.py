@@ -0,0 +1,77 @@
+"""
+Faceted counts for the product catalog.
+
+All facets are computed by a single UNION of grouped aggregates, so the
+database is hit once no matter how many facets are returned.
+"""
+
+from django.db.models import Case, CharField, Count, F, Value, When
+from .models import Product
+
+# (key, lower bound inclusive, upper bound exclusive) in KES, on Product.effective_price
+PRICE_BUCKETS = [
+    ('0-10000', 0, 10000),
+    ('10000-25000', 10000, 25000),
+    ('25000-50000', 25000, 50000),
+    ('50000-100000', 50000, 100000),
+    ('100000+', 100000, None),
+]
+
+FACETS = ['category', 'brand', 'product_type', 'price']
+
+
+def _price_bucket_expression():
+    whens = []
+    for key, _, upper in PRICE_BUCKETS:
+        if upper is None:
+            break
+        whens.append(When(effective_price__lt=upper, then=Value(key)))
+    return Case(*whens, default=Value(PRICE_BUCKETS[-1][0]), output_field=CharField())
+
+
+def _facet_query(queryset, facet, key, label):
+    return (
+        queryset
+        .annotate(facet=Value(facet, output_field=CharField()), key=key, label=label)
+        .values('facet', 'key', 'label')
+        .annotate(count=Count('pk'))
+        .order_by()
+    )
+
+
+def compute_facets(queryset):
+    """
+    Return counts per category, brand, product type and price bucket for
+    the products in queryset.
+    """
+    queryset = queryset.select_related(None).prefetch_related(None).order_by()
+    type_labels = dict(Product.PRODUCT_TYPES)
+    empty = Value('', output_field=CharField())
+
+    rows = _facet_query(queryset, 'category', F('category__slug'), F('category__name')).union(
+        _facet_query(queryset, 'brand', F('brand__slug'), F('brand__name')),
+        _facet_query(queryset, 'product_type', F('product_type'), empty),
+        _facet_query(queryset, 'price', _price_bucket_expression(), empty),
+        all=True,
+    )
+
+    facets = {name: [] for name in FACETS}
+    for row in rows:
+        if row['key'] is None:
+            continue  # e.g. products without a brand
+        entry = {'value': row['key'], 'label': row['label'], 'count': row['count']}
+        if row['facet'] == 'product_type':
+            entry['label'] = type_labels.get(row['key'], row['key'])
+        facets[row['facet']].append(entry)
+
+    for name in ('category', 'brand', 'product_type'):
+        facets[name].sort(key=lambda entry: (-entry['count'], entry['label']))
+
+    # Keep price buckets in range order and include empty ones
+    price_counts = {entry['value']: entry['count'] for entry in facets['price']}
+    facets['price'] = [
+        {'value': key, 'min': lower, 'max': upper, 'count': price_counts.get(key, 0)}
+        for key, lower, upper in PRICE_BUCKETS
+    ]
+    facets['total'] = sum(entry['count'] for entry in facets['product_type'])
+    return facets
@@ -0,0 +1,133 @@
+"""
+Idempotency-Key support for POST endpoints that must not run twice.
+
+A client that may retry a request sends the same Idempotency-Key header with
+every attempt. The first attempt claims the key by inserting an
+IdempotencyKey row, committed before the view runs, so the unique
+(owner, key) constraint decides between gunicorn workers which attempt runs:
+
+- a retry after the first attempt succeeded gets the stored response back
+  (with an Idempotent-Replayed header) without the view running again;
+- a retry while the first attempt is still running gets 409;
+- reusing a key with a different request gets 422.
+
+Keys are scoped to the user, or for guests to their session (a guest with a
+cart has one); a guest without a session cookie gets 400.
+
+Only successful responses are stored. After an error the key is released, so
+the client can retry once the problem is fixed. A claim whose worker died is
+taken over once it expires after CLAIM_TTL; stored responses are kept for
+KEY_TTL (purge_stale_carts deletes expired rows).
+"""
+
+import functools
+import hashlib
+import json
+from datetime import timedelta
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+from .models import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+KEY_TTL = timedelta(hours=24)
+CLAIM_TTL = timedelta(minutes=5)
+CLAIM_ATTEMPTS = 3
+
+
+class RequestInProgress(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'A request with this Idempotency-Key is still being processed. Retry later.'
+    default_code = 'idempotency_in_progress'
+
+
+class KeyReused(APIException):
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    default_detail = 'This Idempotency-Key was already used for a different request.'
+    default_code = 'idempotency_key_reused'
+
+
+def owner_for(request):
+    if request.user.is_authenticated:
+        return f'user:{request.user.pk}'
+    if request.session.session_key:
+        return f'session:{request.session.session_key}'
+    # Sessionless clients would all share one key namespace, and a session
+    # created now would not come back with a retry that lacks the cookie
+    raise ValidationError({HEADER: 'Requires a login or a session cookie.'})
+
+
+def fingerprint(request):
+    data = request.data
+    if hasattr(data, 'lists'):  # QueryDict from form or multipart bodies
+        data = dict(data.lists())
+    body = json.dumps(data, sort_keys=True, default=str)
+    return hashlib.sha256(f'{request.method} {request.get_full_path()} {body}'.encode()).hexdigest()
+
+
+def _claim(owner, key, request_fingerprint):
+    """Insert the in-progress row for (owner, key); returns (claim, None), or (None, existing row)"""
+    for _ in range(CLAIM_ATTEMPTS):
+        try:
+            with transaction.atomic():
+                claim = IdempotencyKey.objects.create(
+                    owner=owner, key=key, fingerprint=request_fingerprint,
+                    expires_at=timezone.now() + CLAIM_TTL,
+                )
+            return claim, None
+        except IntegrityError:
+            existing = IdempotencyKey.objects.filter(owner=owner, key=key).first()
+            if existing is None:
+                continue  # released in the meantime
+            if existing.expires_at > timezone.now():
+                return None, existing
+            # Expired: whoever deletes it gets to claim the key again
+            IdempotencyKey.objects.filter(pk=existing.pk, expires_at__lte=timezone.now()).delete()
+    raise RequestInProgress()
+
+
+def idempotent(view_method):
+    """
+    Decorator for a view or viewset method handling a POST. Requests without
+    the Idempotency-Key header run as before.
+    """
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if key is None:
+            return view_method(self, request, *args, **kwargs)
+        if not key or len(key) > IdempotencyKey._meta.get_field('key').max_length:
+            raise ValidationError({HEADER: 'Must be 1 to 255 characters.'})
+
+        owner, request_fingerprint = owner_for(request), fingerprint(request)
+        claim, existing = _claim(owner, key, request_fingerprint)
+        if existing is not None:
+            if existing.fingerprint != request_fingerprint:
+                raise KeyReused()
+            if existing.status_code is None:
+                raise RequestInProgress()
+            return Response(
+                json.loads(existing.response), status=existing.status_code,
+                headers={'Idempotent-Replayed': 'true'},
+            )
+
+        claimed = IdempotencyKey.objects.filter(pk=claim.pk)
+        try:
+            response = view_method(self, request, *args, **kwargs)
+        except Exception:
+            claimed.delete()
+            raise
+        if status.is_success(response.status_code):
+            claimed.update(
+                status_code=response.status_code,
+                response=json.dumps(response.data, cls=JSONEncoder),
+                expires_at=timezone.now() + KEY_TTL,
+            )
+        else:
+            claimed.delete()
+        return response
+    return wrapper
+
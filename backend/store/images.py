@@ -0,0 +1,166 @@
+"""
+Responsive image derivatives.
+
+Every catalog image gets resized WebP and JPEG copies at DERIVATIVE_WIDTHS,
+stored next to the original under a predictable name
+("products/phone.jpg" -> "products/phone_jpg_w400.webp"). Because the names are
+derived from the original, serializers can build `srcset` strings without
+an extra database column; they only check that the last derivative written
+exists, so an image that could not be decoded, or was not processed yet,
+gets no srcset and clients fall back to the original.
+
+Derivatives are generated when a model in IMAGE_FIELDS is saved with a new
+image (store.signals) and for existing media by the
+generate_image_derivatives command. Originals are never upscaled: a
+derivative wider than its original keeps the original size.
+"""
+
+import logging
+import os
+from io import BytesIO
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils.encoding import filepath_to_uri
+from PIL import Image, ImageOps, UnidentifiedImageError
+from rest_framework import serializers
+
+logger = logging.getLogger(__name__)
+
+DERIVATIVE_WIDTHS = [200, 400, 800, 1200]
+# format -> (file extension, Pillow save options)
+DERIVATIVE_FORMATS = {
+    'webp': ('webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+# (app label.model, image field) pairs that get derivatives
+IMAGE_FIELDS = [
+    ('store.Product', 'image'),
+    ('store.ProductImage', 'image'),
+    ('store.Brand', 'logo'),
+    ('store.Bank', 'logo'),
+    ('store.HeroSlide', 'image'),
+    ('store.EducationBoard', 'image'),
+    ('store.EducationTablet', 'image'),
+]
+
+
+def derivative_name(name, width, image_format):
+    # Keep the original's extension in the name, so phone.jpg and phone.png
+    # in the same folder don't share derivatives
+    root, source_extension = os.path.splitext(name)
+    if source_extension:
+        root = f'{root}_{source_extension[1:]}'
+    extension = DERIVATIVE_FORMATS[image_format][0]
+    return f'{root}_w{width}.{extension}'
+
+
+def derivatives_ready(name, storage=default_storage):
+    """True once every derivative of `name` is written (generate_derivatives writes this one last)."""
+    image_format = list(DERIVATIVE_FORMATS)[-1]
+    return storage.exists(derivative_name(name, DERIVATIVE_WIDTHS[-1], image_format))
+
+
+def _flatten(image, image_format):
+    if image_format == 'webp':
+        return image if image.mode in ('RGB', 'RGBA') else image.convert('RGBA')
+    if image.mode in ('RGBA', 'LA', 'P'):
+        # JPEG has no alpha: composite transparent logos onto white
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def generate_derivatives(name, storage=default_storage, force=False):
+    """
+    Write the missing derivatives of the image stored at `name`.
+    Returns the number written; unreadable or missing originals are skipped.
+    """
+    if not name or not storage.exists(name):
+        return 0
+    # In format then width order: derivatives_ready() checks the last one
+    missing = [
+        (width, image_format) for image_format in DERIVATIVE_FORMATS for width in DERIVATIVE_WIDTHS
+        if force or not storage.exists(derivative_name(name, width, image_format))
+    ]
+    if not missing:
+        return 0
+
+    try:
+        with storage.open(name, 'rb') as source:
+            image = Image.open(source)
+            # Let the JPEG decoder downscale while reading multi-megapixel photos
+            image.draft('RGB', (max(DERIVATIVE_WIDTHS), max(DERIVATIVE_WIDTHS)))
+            image = ImageOps.exif_transpose(image)
+            image.load()
+    except (OSError, UnidentifiedImageError, Image.DecompressionBombError) as error:
+        logger.warning('Cannot create derivatives of %s: %s', name, error)
+        return 0
+
+    written = 0
+    resized = {}
+    for width, image_format in missing:
+        if width not in resized:
+            if image.width > width:
+                height = max(1, round(image.height * width / image.width))
+                resized[width] = image.resize((width, height), Image.LANCZOS)
+            else:
+                resized[width] = image
+        buffer = BytesIO()
+        options = DERIVATIVE_FORMATS[image_format][1]
+        _flatten(resized[width], image_format).save(buffer, format=image_format.upper(), **options)
+        target = derivative_name(name, width, image_format)
+        if storage.exists(target):
+            storage.delete(target)
+        storage.save(target, ContentFile(buffer.getvalue()))
+        written += 1
+    return written
+
+
+def media_url_builder(field, request):
+    """
+    Return name -> URL for an ImageField, matching DRF's ImageField output
+    but resolving the storage base URL once instead of per row.
+    """
+    storage = field.storage
+    base_url = storage.url('')
+    if request is not None:
+        base_url = request.build_absolute_uri(base_url)
+
+    def build(name):
+        if not name:
+            return None
+        return base_url + filepath_to_uri(name).lstrip('/')
+    return build
+
+
+def srcset_builder(field, request):
+    """
+    Return name -> {format: srcset string} for an ImageField, or None without
+    an image or before its derivatives exist.
+    """
+    url = media_url_builder(field, request)
+
+    def build(name):
+        if not name or not derivatives_ready(name, field.storage):
+            return None
+        return {
+            image_format: ', '.join(
+                f'{url(derivative_name(name, width, image_format))} {width}w' for width in DERIVATIVE_WIDTHS
+            )
+            for image_format in DERIVATIVE_FORMATS
+        }
+    return build
+
+
+class ImageSrcsetField(serializers.ReadOnlyField):
+    """
+    Read-only `srcset` strings per format for an image field, e.g.
+    {"webp": ".../phone_jpg_w200.webp 200w, ...", "jpeg": "..."}; null without an
+    image or its derivatives, in which case clients use the original image URL.
+    """
+
+    def to_representation(self, value):
+        return srcset_builder(value.field, self.context.get('request'))(value.name)
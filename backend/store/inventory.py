@@ -0,0 +1,186 @@
+"""
+Stock reservations.
+
+Stock is only ever taken with a conditional UPDATE
+(stock = stock - n WHERE stock >= n), so two shoppers can never both get the
+last unit, however their requests interleave:
+
+- place_holds() runs when checkout starts (POST /api/orders/reserve/). It
+  takes the stock of every cart line and records StockReservation rows that
+  expire after HOLD_TTL.
+- commit_stock() runs in OrderViewSet.create's transaction. It uses up the
+  shopper's holds, takes whatever was not held, and gives back holds for
+  items that are no longer ordered.
+- release_expired() (the release_stock_holds command) gives expired holds
+  back to stock.
+
+A hold is used or released by whoever deletes its row inside a transaction
+that also moves the stock, so an order and the sweeper never both act on one
+hold. Variant lines draw on the variant's stock, other lines on the product
+or tablet.
+"""
+
+from collections import defaultdict
+from datetime import timedelta
+from django.db import models, transaction
+from django.utils import timezone
+from .cache import bump_generation
+from .models import EducationTablet, Product, ProductVariant, StockReservation
+
+HOLD_TTL = timedelta(minutes=15)
+
+# Models are always updated in this order, so concurrent checkouts lock rows in the same order
+STOCK_MODELS = [Product, ProductVariant, EducationTablet]
+
+
+class OutOfStock(Exception):
+    def __init__(self, lines):
+        super().__init__('Not enough stock')
+        self.lines = lines  # the cart lines that could not be covered
+
+
+def holder_for(request):
+    if request.user.is_authenticated:
+        return f'user:{request.user.pk}'
+    if request.session.session_key is None:
+        request.session.save()  # guests without a session would all share 'session:None'
+    return f'session:{request.session.session_key}'
+
+
+def stock_target(line):
+    """(model, pk) whose stock a cart line or hold draws on"""
+    if line.education_tablet_id:
+        return EducationTablet, line.education_tablet_id
+    if line.variant_id:
+        return ProductVariant, line.variant_id
+    return Product, line.product_id
+
+
+def _quantities(lines):
+    totals = defaultdict(int)
+    for line in lines:
+        totals[stock_target(line)] += line.quantity
+    return totals
+
+
+def _by_model(totals):
+    """{(model, pk): n} -> [(model, {pk: n})] in STOCK_MODELS order"""
+    grouped = defaultdict(dict)
+    for (model, pk), quantity in totals.items():
+        if quantity:
+            grouped[model][pk] = quantity
+    return [(model, grouped[model]) for model in STOCK_MODELS if model in grouped]
+
+
+def _amount(quantities):
+    return models.Case(
+        *[models.When(pk=pk, then=models.Value(quantity)) for pk, quantity in quantities.items()],
+        output_field=models.PositiveIntegerField(),
+    )
+
+
+class _Short(Exception):
+    pass
+
+
+def _bump_on_commit(grouped):
+    # Queryset updates send no post_save, so cached stock flags are invalidated here
+    for model, _ in grouped:
+        transaction.on_commit(lambda model=model: bump_generation(model))
+
+
+def _take(totals):
+    """
+    Take {(model, pk): n} of stock with one conditional UPDATE per model, all
+    or nothing. Returns the (model, pk) targets that are short of stock.
+    """
+    grouped = _by_model(totals)
+    try:
+        with transaction.atomic():
+            for model, quantities in grouped:
+                amount = _amount(quantities)
+                taken = model.objects.filter(pk__in=quantities, stock__gte=amount).update(
+                    stock=models.F('stock') - amount
+                )
+                if taken != len(quantities):
+                    raise _Short
+            _bump_on_commit(grouped)
+    except _Short:
+        short = []
+        for model, quantities in grouped:
+            stock = dict(model.objects.filter(pk__in=quantities).values_list('pk', 'stock'))
+            short.extend((model, pk) for pk, quantity in quantities.items() if stock.get(pk, 0) < quantity)
+        return short
+    return []
+
+
+def _give_back(totals):
+    grouped = _by_model(totals)
+    for model, quantities in grouped:
+        model.objects.filter(pk__in=quantities).update(stock=models.F('stock') + _amount(quantities))
+    _bump_on_commit(grouped)
+
+
+def _delete_holds(holder):
+    """Delete the holder's holds; returns what they held as {(model, pk): n}"""
+    holds = list(StockReservation.objects.select_for_update().filter(holder=holder))
+    if holds:
+        StockReservation.objects.filter(pk__in=[hold.pk for hold in holds]).delete()
+    return _quantities(holds)
+
+
+def place_holds(holder, lines):
+    """
+    Replace the holder's holds with one per cart line, expiring after
+    HOLD_TTL; returns the expiry time. Raises OutOfStock if any line can't
+    be covered, in which case the previous holds are kept.
+    """
+    expires_at = timezone.now() + HOLD_TTL
+    with transaction.atomic():
+        _give_back(_delete_holds(holder))
+        short = set(_take(_quantities(lines)))
+        if short:
+            raise OutOfStock([line for line in lines if stock_target(line) in short])
+        StockReservation.objects.bulk_create([
+            StockReservation(
+                holder=holder, product_id=line.product_id, variant_id=line.variant_id,
+                education_tablet_id=line.education_tablet_id, quantity=line.quantity, expires_at=expires_at,
+            )
+            for line in lines
+        ])
+    return expires_at
+
+
+def commit_stock(holder, lines):
+    """
+    Take the stock for an order's lines: the holder's holds are used up
+    first (an expired hold the sweeper has not released yet still counts),
+    the rest is taken now, and held stock that is not ordered goes back.
+    Must run inside the order's transaction; raises OutOfStock.
+    """
+    held = _delete_holds(holder)
+    needed = defaultdict(int)
+    for target, quantity in _quantities(lines).items():
+        from_hold = min(held[target], quantity)
+        held[target] -= from_hold
+        needed[target] = quantity - from_hold
+    short = set(_take(needed))
+    if short:
+        raise OutOfStock([line for line in lines if stock_target(line) in short])
+    _give_back(held)
+
+
+def release_expired(batch_size=500):
+    """Give the stock of expired holds back, in batches. Returns the number of holds released."""
+    now = timezone.now()
+    released = 0
+    while True:
+        with transaction.atomic():
+            holds = list(
+                StockReservation.objects.select_for_update().filter(expires_at__lte=now).order_by('pk')[:batch_size]
+            )
+            if not holds:
+                return released
+            StockReservation.objects.filter(pk__in=[hold.pk for hold in holds]).delete()
+            _give_back(_quantities(holds))
+        released += len(holds)
@@ -0,0 +1,94 @@
+"""
+Shared helpers for the benchmark_* management commands.
+
+Benchmarks never touch the configured database: they run against a throwaway
+test database created with Django's test runner utilities.
+"""
+import random
+import statistics
+import time
+from contextlib import contextmanager
+from decimal import Decimal
+from django.core.management.base import BaseCommand
+from django.test.utils import setup_databases, teardown_databases
+from store.models import Brand, Category, Product
+
+BRAND_NAMES = ['Samsung', 'Apple', 'Google', 'OnePlus', 'Xiaomi', 'Oppo', 'Tecno', 'Infinix', 'Nokia', 'Lenovo']
+MODEL_WORDS = ['Galaxy', 'Pixel', 'Redmi', 'Reno', 'Nord', 'Spark', 'Hot', 'Camon', 'Note', 'Tab', 'Pro', 'Max', 'Lite', 'Ultra', 'Plus']
+DESCRIPTION_WORDS = [
+    'display', 'battery', 'camera', 'storage', 'fast', 'charging', 'amoled', 'processor', 'octa', 'core',
+    'network', 'dual', 'sim', 'fingerprint', 'sensor', 'wireless', 'premium', 'design', 'affordable', 'performance',
+]
+# Long-tail vocabulary so that most description terms are selective, as in real catalog copy
+FILLER_WORDS = [f'{a}{b}' for a in ('al', 'be', 'co', 'da', 'el', 'fi', 'go', 'hu') for b in range(50)]
+
+
+@contextmanager
+def scratch_database(verbosity=0):
+    """Create an isolated test database for the duration of the block."""
+    old_config = setup_databases(verbosity=verbosity, interactive=False, aliases={'default'})
+    try:
+        yield
+    finally:
+        teardown_databases(old_config, verbosity=verbosity)
+
+
+def seed_products(count, batch_size=2000, seed=42):
+    """Bulk insert `count` synthetic products (signals are not fired)."""
+    rng = random.Random(seed)
+    brands = Brand.objects.bulk_create([
+        Brand(name=name, slug=name.lower()) for name in BRAND_NAMES
+    ])
+    categories = Category.objects.bulk_create([
+        Category(name=f'Category {i}', slug=f'category-{i}', category_type=kind)
+        for i, kind in enumerate(['shop', 'msme', 'enterprise', 'education'])
+    ])
+    product_types = ['shop', 'msme', 'enterprise', 'shop']
+    created = 0
+    while created < count:
+        batch = []
+        for i in range(created, min(created + batch_size, count)):
+            brand = rng.choice(brands)
+            category_index = rng.randrange(len(categories))
+            price = Decimal(rng.randrange(5000, 250000))
+            sale_price = price - 500 if i % 3 == 0 else None
+            batch.append(Product(
+                name=f'{brand.name} {rng.choice(MODEL_WORDS)} {rng.randrange(1, 99)} {rng.choice(MODEL_WORDS)}',
+                slug=f'product-{i}',
+                brand=brand,
+                category=categories[category_index],
+                product_type=product_types[category_index],
+                description=' '.join(rng.sample(DESCRIPTION_WORDS, 3) + rng.sample(FILLER_WORDS, 60)),
+                price=price,
+                sale_price=sale_price,
+                effective_price=sale_price or price,  # bulk_create skips Product.save()
+                stock=rng.randrange(0, 50),
+                image=f'products/product-{i}.jpg',
+            ))
+        Product.objects.bulk_create(batch)
+        created += len(batch)
+    return created
+
+
+def time_call(func, repeat=5):
+    """Return the median wall time of func() in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+class BenchmarkCommand(BaseCommand):
+    """Base class for benchmarks; subclasses implement run_benchmark()."""
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs per measurement (median reported)')
+
+    def handle(self, *args, **options):
+        self.run_benchmark(**options)
+        self.stdout.write(self.style.SUCCESS('\nBenchmark complete.'))
+
+    def run_benchmark(self, **options):
+        raise NotImplementedError
@@ -0,0 +1,55 @@
+"""
+Benchmark checkout (POST /api/orders/) for carts of different sizes.
+Usage: python manage.py benchmark_checkout [--lines 1 10 100] [--repeat 5]
+"""
+import statistics
+import time
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+from store.models import Cart, CartItem, Product
+from store.views import OrderViewSet
+from ._benchmark import BenchmarkCommand, scratch_database, seed_products
+
+ORDER_DATA = {
+    'full_name': 'Benchmark Buyer', 'email': 'buyer@example.com', 'phone': '0700000000',
+    'town': 'Nairobi', 'address': 'Street',
+}
+
+
+class Command(BenchmarkCommand):
+    help = 'Time checkout and count its queries for carts of 1, 10 and 100 lines'
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--lines', type=int, nargs='+', default=[1, 10, 100])
+
+    def run_benchmark(self, **options):
+        lines = sorted(options['lines'])
+        with scratch_database():
+            seed_products(lines[-1])
+            Product.objects.update(stock=10000)  # every run sells one of each
+            products = list(Product.objects.order_by('pk')[:lines[-1]])
+            user = User.objects.create_user('benchmark')
+            cart = Cart.objects.create(user=user)
+            view = OrderViewSet.as_view({'post': 'create'})
+            factory = APIRequestFactory()
+
+            def checkout():
+                request = factory.post('/api/orders/', ORDER_DATA, HTTP_HOST=settings.ALLOWED_HOSTS[0])
+                force_authenticate(request, user)
+                response = view(request)
+                assert response.status_code == 201, response.data
+
+            self.stdout.write(f'{"lines":>6} {"checkout ms":>12} {"queries":>8}')
+            for count in lines:
+                samples = []
+                for _ in range(options['repeat']):
+                    CartItem.objects.bulk_create([CartItem(cart=cart, product=product) for product in products[:count]])
+                    with CaptureQueriesContext(connection) as queries:
+                        start = time.perf_counter()
+                        checkout()
+                        samples.append((time.perf_counter() - start) * 1000)
+                self.stdout.write(f'{count:>6} {statistics.median(samples):>12.2f} {len(queries):>8}')
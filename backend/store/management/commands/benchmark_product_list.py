@@ -0,0 +1,46 @@
+"""
+Benchmark product list rendering: ProductListSerializer over model instances
+vs the flat .values() projection in store.projections.
+Usage: python manage.py benchmark_product_list [--rows 12 100 1000] [--repeat 5]
+"""
+from django.conf import settings
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from store.models import Product
+from store.projections import ProductListProjectionSerializer, product_list_values
+from store.querysets import plan_queryset
+from store.serializers import ProductListSerializer
+from ._benchmark import BenchmarkCommand, scratch_database, seed_products, time_call
+
+
+class Command(BenchmarkCommand):
+    help = 'Compare product list serialization via model instances vs a .values() projection'
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--rows', type=int, nargs='+', default=[12, 100, 1000])
+
+    def run_benchmark(self, **options):
+        repeat = options['repeat']
+        rows = sorted(options['rows'])
+        with scratch_database():
+            seed_products(rows[-1])
+            request = Request(APIRequestFactory().get('/api/products/', HTTP_HOST=settings.ALLOWED_HOSTS[0]))
+            context = {'request': request}
+            base = plan_queryset(
+                Product.objects.filter(is_active=True).order_by('-created_at'), ProductListSerializer
+            )
+
+            self.stdout.write(f'{"rows":>6} {"serializer ms":>14} {"projection ms":>14} {"speedup":>8}')
+            for count in rows:
+                def serializer():
+                    return ProductListSerializer(list(base[:count]), many=True, context=context).data
+
+                def projection():
+                    page = list(product_list_values(base)[:count])
+                    return ProductListProjectionSerializer(page, context=context).data
+
+                if serializer() != projection():
+                    self.stderr.write(f'Output mismatch at {count} rows')
+                slow, fast = time_call(serializer, repeat), time_call(projection, repeat)
+                self.stdout.write(f'{count:>6} {slow:>14.2f} {fast:>14.2f} {slow / fast:>7.1f}x')
@@ -0,0 +1,47 @@
+"""
+Benchmark ranked index search against the old icontains scan.
+Usage: python manage.py benchmark_search [--sizes 10000 100000] [--repeat 5]
+"""
+from django.db.models import Q
+from store.models import Product
+from store.search import index_products, search_products
+from ._benchmark import BenchmarkCommand, scratch_database, seed_products, time_call
+
+QUERIES = ['samsung', 'galaxy ultra', 'pixel pro camera', 'amoled']
+
+
+class Command(BenchmarkCommand):
+    help = 'Compare search latency of the token index vs icontains at several catalog sizes'
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+
+    def run_benchmark(self, **options):
+        repeat = options['repeat']
+        for size in sorted(options['sizes']):
+            with scratch_database():
+                self.run_size(size, repeat)
+
+    def run_size(self, size, repeat):
+        seeded = seed_products(size)
+        index_products(Product.objects.all())
+
+        base = Product.objects.filter(is_active=True)
+        self.stdout.write(f'\n{seeded} products')
+        self.stdout.write(f'{"query":<20} {"icontains ms":>14} {"index ms":>10}')
+        for query in QUERIES:
+            def scan():
+                qs = base
+                for term in query.split():
+                    qs = qs.filter(
+                        Q(name__icontains=term) | Q(description__icontains=term) | Q(brand__name__icontains=term)
+                    )
+                return list(qs.order_by('-created_at')[:12])
+
+            def indexed():
+                return list(search_products(base, query).order_by('-search_rank', '-created_at')[:12])
+
+            self.stdout.write(
+                f'{query:<20} {time_call(scan, repeat):>14.2f} {time_call(indexed, repeat):>10.2f}'
+            )
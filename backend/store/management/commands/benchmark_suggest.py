@@ -0,0 +1,36 @@
+"""
+Benchmark the in-memory typeahead index against an icontains name scan.
+Usage: python manage.py benchmark_suggest [--sizes 10000 100000] [--repeat 5]
+"""
+from store.models import Product
+from store.suggest import SuggestIndex
+from ._benchmark import BenchmarkCommand, scratch_database, seed_products, time_call
+
+PREFIXES = ['s', 'gal', 'pixel p', 'redmi 4', 'ultra']
+
+
+class Command(BenchmarkCommand):
+    help = 'Measure typeahead build time and lookup latency at several catalog sizes'
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+
+    def run_benchmark(self, **options):
+        repeat = options['repeat']
+        for size in sorted(options['sizes']):
+            with scratch_database():
+                self.run_size(size, repeat)
+
+    def run_size(self, size, repeat):
+        seeded = seed_products(size)
+        index = SuggestIndex()
+        build_ms = time_call(index.rebuild, 1)
+        self.stdout.write(f'\n{seeded} products, index built in {build_ms:.0f} ms')
+        self.stdout.write(f'{"prefix":<12} {"icontains ms":>14} {"index ms":>10}')
+        for prefix in PREFIXES:
+            def scan():
+                return list(Product.objects.filter(name__icontains=prefix).values_list('name', 'slug')[:10])
+
+            lookup_ms = time_call(lambda: [index.suggest(prefix) for _ in range(1000)], repeat) / 1000
+            self.stdout.write(f'{prefix:<12} {time_call(scan, repeat):>14.2f} {lookup_ms:>10.4f}')
@@ -0,0 +1,108 @@
+"""
+Management command to delete abandoned guest carts, expired sessions and
+expired idempotency keys.
+Usage: python manage.py purge_stale_carts [--days 2] [--batch-size 1000] [--pause 0.1]
+
+Safe to run from cron during the day: rows are deleted in bounded primary key
+ranges, each in its own short transaction, instead of one long DELETE
+(Django's clearsessions) that holds locks on the whole table.
+"""
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+from store.models import Cart, CartItem, IdempotencyKey
+
+
+class Command(BaseCommand):
+    help = 'Delete guest carts (and their items) nobody can reach any more, expired sessions and expired idempotency keys, in small batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=float,
+            default=None,
+            help='Delete guest carts not updated for this many days (default: the session cookie age)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows examined per transaction'
+        )
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=0.1,
+            help='Seconds to sleep between batches, leaving room for live traffic'
+        )
+
+    def handle(self, *args, **options):
+        age = timedelta(days=options['days']) if options['days'] is not None else timedelta(
+            seconds=settings.SESSION_COOKIE_AGE
+        )
+        self.batch_size, self.pause = options['batch_size'], options['pause']
+
+        start = time.perf_counter()
+        carts, items = self.purge_carts(timezone.now() - age)
+        self.report('guest carts', carts, start, f' ({items} items)')
+
+        start = time.perf_counter()
+        self.report('expired sessions', self.purge_sessions(timezone.now()), start)
+
+        start = time.perf_counter()
+        self.report('expired idempotency keys', self.purge_idempotency_keys(timezone.now()), start)
+
+    def report(self, label, count, start, extra=''):
+        elapsed = time.perf_counter() - start
+        rate = count / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {count} {label}{extra} in {elapsed:.2f}s ({rate:.0f} rows/s)'
+        ))
+
+    def purge_carts(self, cutoff):
+        stale = Cart.objects.filter(user__isnull=True, updated_at__lt=cutoff)
+        bounds = stale.aggregate(first=Min('pk'), last=Max('pk'))
+        if bounds['first'] is None:
+            return 0, 0
+
+        carts = items = 0
+        for low in range(bounds['first'], bounds['last'] + 1, self.batch_size):
+            window = stale.filter(pk__gte=low, pk__lt=low + self.batch_size)
+            with transaction.atomic():
+                batch_items = CartItem.objects.filter(cart__in=window).delete()[0]
+                batch_carts = window.delete()[1].get('store.Cart', 0)
+            items, carts = items + batch_items, carts + batch_carts
+            if batch_carts:
+                time.sleep(self.pause)
+        return carts, items
+
+    def purge_sessions(self, now):
+        # session_key is a string primary key: walk it in key order
+        expired = Session.objects.filter(expire_date__lt=now).order_by('session_key')
+        deleted, last_key = 0, ''
+        while True:
+            keys = list(
+                expired.filter(session_key__gt=last_key).values_list('session_key', flat=True)[:self.batch_size]
+            )
+            if not keys:
+                return deleted
+            with transaction.atomic():
+                deleted += Session.objects.filter(session_key__in=keys, expire_date__lt=now).delete()[0]
+            last_key = keys[-1]
+            time.sleep(self.pause)
+
+    def purge_idempotency_keys(self, now):
+        expired = IdempotencyKey.objects.filter(expires_at__lt=now)
+        deleted = 0
+        while True:
+            pks = list(expired.values_list('pk', flat=True)[:self.batch_size])
+            if not pks:
+                return deleted
+            with transaction.atomic():
+                deleted += IdempotencyKey.objects.filter(pk__in=pks, expires_at__lt=now).delete()[0]
+            time.sleep(self.pause)
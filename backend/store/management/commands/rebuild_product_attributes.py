@@ -0,0 +1,29 @@
+"""
+Management command to rebuild parsed product attributes.
+Usage: python manage.py rebuild_product_attributes [--batch-size 500]
+"""
+import time
+from django.core.management.base import BaseCommand
+from store.attributes import index_attributes
+from store.cache import bump_generation
+from store.models import Product
+
+
+class Command(BaseCommand):
+    help = 'Re-parse specifications, descriptions and variants into ProductAttribute rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of products parsed per transaction'
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        count = index_attributes(Product.objects.all(), batch_size=options['batch_size'])
+        # bulk writes skip post_save, so invalidate cached (filtered) product responses here
+        bump_generation(Product)
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(f'Parsed attributes of {count} products in {elapsed:.2f}s'))
@@ -0,0 +1,44 @@
+"""
+Management command to rebuild the stored product rating summaries from reviews.
+Usage: python manage.py rebuild_rating_summaries
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from store.cache import bump_generation
+from store.models import Product, Review, rating_summary_values
+
+RATING_FIELDS = ['rating_count', 'rating_sum'] + [f'rating_{i}_count' for i in range(1, 6)]
+
+
+class Command(BaseCommand):
+    help = 'Recompute Product rating count, sum and histogram from the review table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        # One grouped query over the review table instead of a query per product
+        counts = {}
+        for row in Review.objects.values('product_id', 'rating').annotate(count=Count('id')).order_by():
+            counts.setdefault(row['product_id'], []).append(row)
+
+        updated = 0
+        products = Product.objects.only('pk', *RATING_FIELDS).order_by('pk')
+        batch = []
+        with transaction.atomic():
+            for product in products.iterator(chunk_size=options['batch_size']):
+                for field, value in rating_summary_values(counts.get(product.pk, [])).items():
+                    setattr(product, field, value)
+                batch.append(product)
+                if len(batch) >= options['batch_size']:
+                    updated += Product.objects.bulk_update(batch, RATING_FIELDS)
+                    batch = []
+            if batch:
+                updated += Product.objects.bulk_update(batch, RATING_FIELDS)
+
+        # bulk writes skip post_save, so invalidate cached product responses here
+        bump_generation(Product)
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt rating summaries for {updated} products ({len(counts)} with reviews)'
+        ))
@@ -0,0 +1,25 @@
+"""
+Management command to give the stock of expired checkout holds back.
+Usage: python manage.py release_stock_holds [--batch-size 500]
+"""
+import time
+from django.core.management.base import BaseCommand
+from store.inventory import release_expired
+
+
+class Command(BaseCommand):
+    help = 'Release expired stock reservations (see store.inventory), in short transactions'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Holds released per transaction'
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        count = release_expired(batch_size=options['batch_size'])
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(f'Released {count} expired holds in {elapsed:.2f}s'))
@@ -0,0 +1,66 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:02
+
+import re
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Frozen copy of store.search's tokenizer as of this migration
+FIELD_WEIGHTS = {'name': 8, 'brand': 4, 'description': 1}
+TOKEN_MAX_LENGTH = 50
+MIN_TOKEN_LENGTH = 2
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+HTML_TAG_RE = re.compile(r'<[^>]+>')
+
+
+def tokenize(text):
+    if not text:
+        return []
+    text = HTML_TAG_RE.sub(' ', text.lower())
+    return [token[:TOKEN_MAX_LENGTH] for token in TOKEN_RE.findall(text) if len(token) >= MIN_TOKEN_LENGTH]
+
+
+def build_tokens(product):
+    fields = {
+        'name': product.name,
+        'brand': product.brand.name if product.brand_id else '',
+        'description': product.description,
+    }
+    weights = {}
+    for field, text in fields.items():
+        for token in set(tokenize(text)):
+            weights[token] = weights.get(token, 0) + FIELD_WEIGHTS[field]
+    return weights
+
+
+def build_search_index(apps, schema_editor):
+    Product = apps.get_model('store', 'Product')
+    ProductSearchToken = apps.get_model('store', 'ProductSearchToken')
+    for product in Product.objects.select_related('brand').iterator(chunk_size=500):
+        ProductSearchToken.objects.bulk_create([
+            ProductSearchToken(product=product, token=token, weight=weight)
+            for token, weight in build_tokens(product).items()
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0012_bank_financingapplication_certificate_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductSearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=50)),
+                ('weight', models.PositiveIntegerField(default=1)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to='store.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['token', 'product'], name='store_search_token_idx')],
+                'unique_together': {('product', 'token')},
+            },
+        ),
+        migrations.RunPython(build_search_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:16
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_rating_summary(apps, schema_editor):
+    Product = apps.get_model('store', 'Product')
+    Review = apps.get_model('store', 'Review')
+    summaries = {}
+    for row in Review.objects.values('product_id', 'rating').annotate(count=Count('id')).order_by():
+        summary = summaries.setdefault(row['product_id'], {f'rating_{i}_count': 0 for i in range(1, 6)})
+        summary[f'rating_{row["rating"]}_count'] = row['count']
+    for product_id, summary in summaries.items():
+        summary['rating_count'] = sum(summary.values())
+        summary['rating_sum'] = sum(i * summary[f'rating_{i}_count'] for i in range(1, 6))
+        Product.objects.filter(pk=product_id).update(**summary)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0013_productsearchtoken'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='rating_1_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_2_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_3_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_4_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_5_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_rating_summary, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:23
+
+from django.db import migrations, models
+from django.db.models import Case, F, Max, OuterRef, Q, Subquery, When
+
+BATCH_SIZE = 1000
+
+
+def _pk_windows(model):
+    """Yield (start, end) primary key ranges of BATCH_SIZE, so each UPDATE stays small"""
+    last_pk = model.objects.aggregate(last=Max('pk'))['last'] or 0
+    for start in range(0, last_pk + 1, BATCH_SIZE):
+        yield start, start + BATCH_SIZE
+
+
+def backfill_prices(apps, schema_editor):
+    Product = apps.get_model('store', 'Product')
+    ProductVariant = apps.get_model('store', 'ProductVariant')
+    # Same rule as Product.current_price: sale_price when set and non-zero, else price
+    effective_price = Case(
+        When(Q(sale_price__isnull=False) & ~Q(sale_price=0), then=F('sale_price')),
+        default=F('price'),
+    )
+    for start, end in _pk_windows(Product):
+        Product.objects.filter(pk__gte=start, pk__lt=end).update(effective_price=effective_price)
+
+    product_price = Subquery(Product.objects.filter(pk=OuterRef('product_id')).values('effective_price')[:1])
+    for start, end in _pk_windows(ProductVariant):
+        ProductVariant.objects.filter(pk__gte=start, pk__lt=end).update(
+            final_price=product_price + F('price_adjustment')
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0014_product_rating_summary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='effective_price',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=10),
+        ),
+        migrations.AddField(
+            model_name='productvariant',
+            name='final_price',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=10),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['is_active', 'effective_price'], name='store_product_price_idx'),
+        ),
+        migrations.RunPython(backfill_prices, migrations.RunPython.noop),
+    ]
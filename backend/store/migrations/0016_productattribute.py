@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0015_effective_price'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductAttribute',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=50)),
+                ('value', models.CharField(max_length=100)),
+                ('numeric_value', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attributes', to='store.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['key', 'numeric_value', 'product'], name='store_attr_numeric_idx'), models.Index(fields=['key', 'value', 'product'], name='store_attr_value_idx')],
+            },
+        ),
+    ]
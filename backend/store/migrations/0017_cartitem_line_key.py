@@ -0,0 +1,51 @@
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+
+def line_key(item):
+    # Same as CartItem.make_line_key()
+    if item.education_tablet_id:
+        return f't{item.education_tablet_id}'
+    if item.variant_id:
+        return f'p{item.product_id}-v{item.variant_id}'
+    return f'p{item.product_id}'
+
+
+def backfill_line_keys(apps, schema_editor):
+    """Set line_key and fold duplicate lines into the oldest one before the unique constraint is added"""
+    CartItem = apps.get_model('store', 'CartItem')
+    first_lines = {}
+    changed, duplicates = {}, []
+    for item in CartItem.objects.order_by('pk').iterator(chunk_size=BATCH_SIZE):
+        item.line_key = line_key(item)
+        first = first_lines.setdefault((item.cart_id, item.line_key), item)
+        if first is item:
+            changed[item.pk] = item
+        else:
+            first.quantity += item.quantity
+            duplicates.append(item.pk)
+    CartItem.objects.bulk_update(list(changed.values()), ['line_key', 'quantity'], batch_size=BATCH_SIZE)
+    for start in range(0, len(duplicates), BATCH_SIZE):
+        CartItem.objects.filter(pk__in=duplicates[start:start + BATCH_SIZE]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0016_productattribute'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cartitem',
+            name='line_key',
+            field=models.CharField(default='', editable=False, max_length=40),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill_line_keys, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='cartitem',
+            constraint=models.UniqueConstraint(fields=('cart', 'line_key'), name='store_cartitem_unique_line'),
+        ),
+    ]
@@ -1,4 +1,5 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import User
 from decimal import Decimal
 import uuid
@@ -192,6 +193,8 @@ class Product(models.Model):
     specifications = models.TextField(blank=True, default='')
     price = models.DecimalField(max_digits=10, decimal_places=2)
     sale_price = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)
+    # Stored current_price, kept in sync by save(); used for price filters, ordering and facets
+    effective_price = models.DecimalField(max_digits=10, decimal_places=2, default=0, editable=False)
     category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='products')
     product_type = models.CharField(max_length=20, choices=PRODUCT_TYPES, default='shop')
     image = models.ImageField(upload_to='products/')
@@ -199,15 +202,39 @@ class Product(models.Model):
     is_active = models.BooleanField(default=True)
     is_featured = models.BooleanField(default=False)
     is_unique_variant = models.BooleanField(default=False, help_text="For Shop Direct unique variants")
+    
+    # Denormalized review summary, maintained from Review saves/deletes
+    rating_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    rating_1_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_2_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_3_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_4_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_5_count = models.PositiveIntegerField(default=0, editable=False)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [models.Index(fields=['is_active', 'effective_price'], name='store_product_price_idx')]
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        self.effective_price = self.current_price
+        update_fields = kwargs.get('update_fields')
+        price_changed = update_fields is None or bool({'price', 'sale_price'} & set(update_fields))
+        if update_fields is not None and price_changed:
+            kwargs['update_fields'] = {*update_fields, 'effective_price'}
+        adding = self._state.adding
+        super().save(*args, **kwargs)
+        if price_changed and not adding:
+            # Re-price stored variant final prices that no longer match
+            final_price = models.F('price_adjustment') + self.effective_price
+            self.variants.exclude(final_price=final_price).update(final_price=final_price)
+
     @property
     def in_stock(self):
         return self.stock > 0
@@ -215,6 +242,71 @@ class Product(models.Model):
     @property
     def current_price(self):
         return self.sale_price if self.sale_price else self.price
+    
+    @property
+    def average_rating(self):
+        if self.rating_count:
+            return self.rating_sum / self.rating_count
+        return None
+    
+    @property
+    def rating_histogram(self):
+        return {str(i): getattr(self, f'rating_{i}_count') for i in range(1, 6)}
+    
+    def add_rating(self, rating):
+        """Atomically fold one new review rating into the stored summary"""
+        Product.objects.filter(pk=self.pk).update(**{
+            'rating_count': models.F('rating_count') + 1,
+            'rating_sum': models.F('rating_sum') + rating,
+            f'rating_{rating}_count': models.F(f'rating_{rating}_count') + 1,
+        })
+    
+    def refresh_rating_summary(self):
+        """Recompute the stored summary from this product's reviews"""
+        Product.objects.filter(pk=self.pk).update(**rating_summary_values(
+            self.reviews.values('rating').annotate(count=models.Count('id'))
+        ))
+
+
+def rating_summary_values(rating_counts):
+    """Product rating fields from rows of {'rating': r, 'count': n}"""
+    values = {f'rating_{i}_count': 0 for i in range(1, 6)}
+    for row in rating_counts:
+        values[f'rating_{row["rating"]}_count'] = row['count']
+    values['rating_count'] = sum(values.values())
+    values['rating_sum'] = sum(i * values[f'rating_{i}_count'] for i in range(1, 6))
+    return values
+
+
+class ProductSearchToken(models.Model):
+    """Inverted search index: one weighted token per product, maintained by store.search"""
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='search_tokens')
+    token = models.CharField(max_length=50)
+    weight = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        unique_together = ('product', 'token')
+        indexes = [models.Index(fields=['token', 'product'], name='store_search_token_idx')]
+
+    def __str__(self):
+        return f"{self.token} -> {self.product_id} ({self.weight})"
+
+
+class ProductAttribute(models.Model):
+    """Attribute parsed from specifications/description/variants, maintained by store.attributes"""
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='attributes')
+    key = models.CharField(max_length=50)  # e.g. "ram", "ram_gb", "color"
+    value = models.CharField(max_length=100)  # normalized (lowercase) text
+    numeric_value = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['key', 'numeric_value', 'product'], name='store_attr_numeric_idx'),
+            models.Index(fields=['key', 'value', 'product'], name='store_attr_value_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id}: {self.key}={self.value}"
 
 
 class ProductVariant(models.Model):
@@ -227,13 +319,18 @@ class ProductVariant(models.Model):
     price_adjustment = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     stock = models.PositiveIntegerField(default=0)
     sku = models.CharField(max_length=100, unique=True)
+    # Product current price + price_adjustment, kept in sync by save() and Product.save()
+    final_price = models.DecimalField(max_digits=10, decimal_places=2, default=0, editable=False)
     
     def __str__(self):
         return f"{self.product.name} - {self.name}"
     
-    @property
-    def final_price(self):
-        return self.product.current_price + self.price_adjustment
+    def save(self, *args, **kwargs):
+        self.final_price = self.product.current_price + self.price_adjustment
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'price_adjustment' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'final_price'}
+        super().save(*args, **kwargs)
 
 
 class ProductImage(models.Model):
@@ -621,6 +718,75 @@ class SchoolTabletOrderItem(models.Model):
 
 # ============ SHOP DIRECT & CART ============
 
+def cart_unit_price(prefix=''):
+    """
+    SQL expression for a cart line's unit price (see CartItem.unit_price);
+    `prefix` is the path to the CartItem, e.g. 'items__' from Cart.
+    """
+    return models.Case(
+        models.When(**{f'{prefix}education_tablet__isnull': False}, then=models.F(f'{prefix}education_tablet__price')),
+        models.When(**{f'{prefix}variant__isnull': False}, then=models.F(f'{prefix}variant__final_price')),
+        default=models.F(f'{prefix}product__effective_price'),
+        output_field=models.DecimalField(max_digits=10, decimal_places=2),
+    )
+
+
+class CartQuerySet(models.QuerySet):
+    def with_totals(self):
+        """Annotate total_amount and total_quantity, computed by the database in one grouped join"""
+        line_total = models.ExpressionWrapper(
+            cart_unit_price('items__') * models.F('items__quantity'),
+            output_field=models.DecimalField(max_digits=12, decimal_places=2),
+        )
+        return self.annotate(
+            total_amount=Coalesce(
+                models.Sum(line_total), models.Value(0), output_field=models.DecimalField(max_digits=12, decimal_places=2)
+            ),
+            total_quantity=Coalesce(models.Sum('items__quantity'), models.Value(0)),
+        )
+
+
+# Tries at writing a cart line before a unique line conflict with concurrent requests is given up
+CART_LINE_ATTEMPTS = 3
+
+
+class CartItemQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for obj in objs:
+            obj.line_key = obj.build_line_key()
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def add(self, cart, product_id=None, variant_id=None, education_tablet_id=None, quantity=1):
+        """
+        Add `quantity` to the cart's line for an item, creating the line if
+        needed. The increment is a single UPDATE (quantity = quantity + n); a
+        create that loses a race to another request (unique cart + line_key)
+        goes back to incrementing the line that request created.
+        """
+        item = dict(product_id=product_id, variant_id=variant_id, education_tablet_id=education_tablet_id)
+        line = self.filter(cart=cart, line_key=CartItem.make_line_key(**item))
+        for attempt in range(CART_LINE_ATTEMPTS):
+            if line.update(quantity=models.F('quantity') + quantity):
+                return
+            try:
+                with transaction.atomic():
+                    self.create(cart=cart, quantity=quantity, **item)
+                return
+            except IntegrityError:
+                if attempt == CART_LINE_ATTEMPTS - 1:
+                    raise
+
+    def with_prices(self):
+        """Annotate line_unit_price and line_total"""
+        return self.annotate(line_unit_price=cart_unit_price()).annotate(
+            line_total=models.ExpressionWrapper(
+                models.F('line_unit_price') * models.F('quantity'),
+                output_field=models.DecimalField(max_digits=12, decimal_places=2),
+            )
+        )
+
+
 class Cart(models.Model):
     """Shopping cart"""
     cart_id = models.UUIDField(default=uuid.uuid4, editable=False, unique=True)
@@ -629,16 +795,25 @@ class Cart(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = CartQuerySet.as_manager()
+    
     def __str__(self):
         return f"Cart {self.cart_id}"
     
+    def _totals(self):
+        # Loaded with Cart.objects.with_totals() -> no query
+        if not hasattr(self, 'total_amount'):
+            totals = Cart.objects.filter(pk=self.pk).with_totals().values('total_amount', 'total_quantity').get()
+            self.total_amount, self.total_quantity = totals['total_amount'], totals['total_quantity']
+        return self.total_amount, self.total_quantity
+    
     @property
     def total(self):
-        return sum(item.total_price for item in self.items.all())
+        return self._totals()[0]
     
     @property
     def item_count(self):
-        return sum(item.quantity for item in self.items.all())
+        return self._totals()[1]
 
 
 class CartItem(models.Model):
@@ -649,9 +824,32 @@ class CartItem(models.Model):
     education_tablet = models.ForeignKey(EducationTablet, on_delete=models.CASCADE, null=True, blank=True)
     quantity = models.PositiveIntegerField(default=1)
     
+    # One line per product, product + variant or tablet in a cart (see make_line_key). A plain
+    # unique (cart, product, variant, education_tablet) would not do: NULLs never collide, and
+    # MySQL ignores conditional unique constraints.
+    line_key = models.CharField(max_length=40, editable=False)
+    
+    objects = CartItemQuerySet.as_manager()
+    
     class Meta:
-        # Remove unique_together constraint since we now have multiple item types
-        pass
+        constraints = [
+            models.UniqueConstraint(fields=['cart', 'line_key'], name='store_cartitem_unique_line'),
+        ]
+    
+    @staticmethod
+    def make_line_key(product_id=None, variant_id=None, education_tablet_id=None):
+        if education_tablet_id:
+            return f't{education_tablet_id}'
+        if variant_id:
+            return f'p{product_id}-v{variant_id}'
+        return f'p{product_id}'
+    
+    def build_line_key(self):
+        return self.make_line_key(self.product_id, self.variant_id, self.education_tablet_id)
+    
+    def save(self, *args, **kwargs):
+        self.line_key = self.build_line_key()
+        super().save(*args, **kwargs)
     
     def __str__(self):
         if self.education_tablet:
@@ -660,6 +858,9 @@ class CartItem(models.Model):
     
     @property
     def unit_price(self):
+        # Loaded with CartItem.objects.with_prices() -> computed by the database
+        if hasattr(self, 'line_unit_price'):
+            return self.line_unit_price
         if self.education_tablet:
             return self.education_tablet.price
         if self.variant:
@@ -668,6 +869,8 @@ class CartItem(models.Model):
     
     @property
     def total_price(self):
+        if hasattr(self, 'line_total'):
+            return self.line_total
         return self.unit_price * self.quantity
     
     @property
@@ -757,6 +960,55 @@ class OrderItem(models.Model):
         return self.unit_price * self.quantity
 
 
+class StockReservation(models.Model):
+    """
+    Stock held for a shopper between the start of checkout and the order
+    (maintained by store.inventory). The held quantity has already been taken
+    off the item's stock; expired holds give it back.
+    """
+    holder = models.CharField(max_length=64)  # "user:<id>" or "session:<key>"
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, null=True, blank=True)
+    variant = models.ForeignKey(ProductVariant, on_delete=models.CASCADE, null=True, blank=True)
+    education_tablet = models.ForeignKey(EducationTablet, on_delete=models.CASCADE, null=True, blank=True)
+    quantity = models.PositiveIntegerField()
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['holder', 'expires_at'], name='store_hold_holder_idx'),
+            models.Index(fields=['expires_at'], name='store_hold_expiry_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.holder}: {self.quantity} until {self.expires_at:%H:%M}"
+
+
+class IdempotencyKey(models.Model):
+    """
+    A client's Idempotency-Key and the response it got (see store.idempotency).
+    status_code is null while the first request is still running.
+    """
+    owner = models.CharField(max_length=64)  # "user:<id>", "session:<key>" or "anonymous"
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)  # sha256 of method, path and body
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response = models.TextField(blank=True)  # JSON
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['owner', 'key'], name='store_idempotency_unique_key'),
+        ]
+        indexes = [
+            models.Index(fields=['expires_at'], name='store_idempotency_expiry_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.owner}: {self.key}"
+
+
 class Review(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='reviews')
     user = models.ForeignKey(User, on_delete=models.CASCADE)
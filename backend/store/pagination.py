@@ -0,0 +1,188 @@
+"""
+Pagination classes for the store API.
+
+KeysetPagination seeks past the last row seen using the ordering value and
+the primary key, so it needs neither OFFSET nor COUNT(*): page 500 costs
+the same as page 1. PageOrCursorPagination keeps the project-wide page
+number behaviour and switches to keyset mode when the client opts in with
+`?pagination=cursor` (or follows a `?cursor=` link).
+"""
+
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination keyed on (ordering field, pk).
+
+    The ordering field is the first ordering term of the (already filtered
+    and ordered) queryset, falling back to `default_ordering`. The primary
+    key is always added as a tie-breaker in the same direction so cursors
+    are stable even when many rows share a created_at or price.
+    """
+    page_size = api_settings.PAGE_SIZE
+    cursor_query_param = 'cursor'
+    default_ordering = '-created_at'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.field, self.descending = self.get_ordering(queryset)
+        cursor = self.decode_cursor(request)
+
+        reverse = bool(cursor and cursor['r'])
+        descending = self.descending != reverse
+        direction = '-' if descending else ''
+        queryset = queryset.order_by(f'{direction}{self.field}', f'{direction}pk')
+        if cursor:
+            try:
+                queryset = queryset.filter(self.after(cursor['v'], cursor['id'], descending))
+            except (TypeError, ValueError, ValidationError):
+                # A value the ordering field can't hold (e.g. text for created_at)
+                raise NotFound(self.invalid_cursor_message)
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        self.next_position = self.previous_position = None
+        if rows:
+            first, last = rows[0], rows[-1]
+            if reverse:
+                self.next_position = self.position(last)
+                self.previous_position = self.position(first) if has_more else None
+            else:
+                self.next_position = self.position(last) if has_more else None
+                self.previous_position = self.position(first) if cursor else None
+        return rows
+
+    def get_ordering(self, queryset):
+        ordering = list(queryset.query.order_by) or list(queryset.model._meta.ordering)
+        field = ordering[0] if ordering and isinstance(ordering[0], str) else self.default_ordering
+        if field.lstrip('-') in ('pk', 'id', '?'):
+            field = self.default_ordering
+        return field.lstrip('-'), field.startswith('-')
+
+    def after(self, value, pk, descending):
+        """Rows strictly after (value, pk) in the current direction."""
+        lookup = 'lt' if descending else 'gt'
+        return (
+            Q(**{f'{self.field}__{lookup}': value})
+            | Q(**{self.field: value, f'pk__{lookup}': pk})
+        )
+
+    def position(self, instance):
+        if isinstance(instance, dict):
+            # Rows of a .values() projection (see store.projections)
+            return {'v': instance[self.field], 'id': instance['id']}
+        return {'v': getattr(instance, self.field), 'id': instance.pk}
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            cursor = json.loads(urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+            if not (
+                isinstance(cursor, dict) and {'v', 'id', 'r'} <= set(cursor)
+                and type(cursor['id']) is int and type(cursor['v']) in (str, int, float)
+                and cursor['r'] in (0, 1)
+            ):
+                raise ValueError
+        except (TypeError, ValueError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        return cursor
+
+    def encode_cursor(self, position, reverse):
+        cursor = dict(position, r=int(reverse))
+        encoded = urlsafe_b64encode(json.dumps(cursor, default=self.encode_value).encode('utf-8')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    @staticmethod
+    def encode_value(value):
+        # Full-precision isoformat: truncating microseconds would skip tied rows
+        if hasattr(value, 'isoformat'):
+            return value.isoformat()
+        return str(value)
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        return self.encode_cursor(self.next_position, reverse=False)
+
+    def get_previous_link(self):
+        if self.previous_position is None:
+            return None
+        return self.encode_cursor(self.previous_position, reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class ReviewPagination(KeysetPagination):
+    """Newest-first review pages for a product"""
+    page_size = 10
+
+
+class PageOrCursorPagination(PageNumberPagination):
+    """
+    Page number pagination by default; keyset pagination (no COUNT, no
+    OFFSET) when the request carries `?pagination=cursor` or `?cursor=`.
+    """
+    mode_query_param = 'pagination'
+    keyset_class = KeysetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if request.query_params.get(self.mode_query_param) == 'cursor' or \
+                request.query_params.get(self.keyset_class.cursor_query_param):
+            self.keyset = self.keyset_class()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_next_link(self):
+        if self.keyset:
+            return self.keyset.get_next_link()
+        return super().get_next_link()
+
+    def get_previous_link(self):
+        if self.keyset:
+            return self.keyset.get_previous_link()
+        return super().get_previous_link()
+
+    def get_html_context(self):
+        if self.keyset:
+            return {'previous_url': self.get_previous_link(), 'next_url': self.get_next_link()}
+        return super().get_html_context()
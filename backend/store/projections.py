@@ -0,0 +1,101 @@
+"""
+Flat projections for hot read paths.
+
+ProductListProjectionSerializer renders product list rows straight from a
+.values() projection: no model instances, no nested CategorySerializer /
+BrandSerializer, no per-row field objects. The output is identical to
+ProductListSerializer (same keys, order and value formatting), which the
+tests assert.
+"""
+
+from decimal import Decimal
+from django.db.models.query import ModelIterable, QuerySet
+from rest_framework import serializers
+from .images import media_url_builder, srcset_builder
+from .models import Brand, Category, Product
+
+PRODUCT_LIST_VALUES = [
+    'id', 'name', 'slug', 'price', 'sale_price', 'product_type', 'image', 'stock',
+    'is_featured', 'is_unique_variant', 'rating_sum', 'rating_count',
+    'category_id', 'category__name', 'category__slug', 'category__category_type',
+    'category__description', 'category__image',
+    'brand_id', 'brand__name', 'brand__slug', 'brand__logo',
+    # Not rendered; read by KeysetPagination as cursor positions
+    'created_at', 'effective_price',
+]
+
+CENT = Decimal('0.01')
+
+
+def product_list_values(queryset):
+    """The .values() projection consumed by ProductListProjectionSerializer."""
+    # Annotations (e.g. search_rank) are kept so they can serve as cursor positions
+    return queryset.select_related(None).prefetch_related(None).values(
+        *PRODUCT_LIST_VALUES, *queryset.query.annotations
+    )
+
+
+def format_decimal(value):
+    """Same string DRF's DecimalField(decimal_places=2) produces."""
+    if value is None:
+        return None
+    return '{:f}'.format(value.quantize(CENT))
+
+
+class ProductListProjectionSerializer(serializers.ListSerializer):
+    """Many=True serializer producing ProductListSerializer rows from .values() dicts."""
+
+    def __init__(self, *args, **kwargs):
+        from .serializers import ProductListSerializer
+        kwargs.setdefault('child', ProductListSerializer())
+        super().__init__(*args, **kwargs)
+
+    def to_representation(self, data):
+        if isinstance(data, QuerySet) and data._iterable_class is ModelIterable:
+            data = product_list_values(data)
+        request = self.context.get('request')
+        product_image = media_url_builder(Product._meta.get_field('image'), request)
+        category_image = media_url_builder(Category._meta.get_field('image'), request)
+        brand_logo = media_url_builder(Brand._meta.get_field('logo'), request)
+        product_srcset = srcset_builder(Product._meta.get_field('image'), request)
+        brand_srcset = srcset_builder(Brand._meta.get_field('logo'), request)
+
+        rows = []
+        for row in data:
+            price = row['price']
+            sale_price = row['sale_price']
+            brand = None
+            if row['brand_id'] is not None:
+                brand = {
+                    'id': row['brand_id'],
+                    'name': row['brand__name'],
+                    'slug': row['brand__slug'],
+                    'logo': brand_logo(row['brand__logo']),
+                    'logo_srcset': brand_srcset(row['brand__logo']),
+                }
+            rows.append({
+                'id': row['id'],
+                'name': row['name'],
+                'slug': row['slug'],
+                'price': format_decimal(price),
+                'sale_price': format_decimal(sale_price),
+                'current_price': format_decimal(sale_price if sale_price else price),
+                'category': {
+                    'id': row['category_id'],
+                    'name': row['category__name'],
+                    'slug': row['category__slug'],
+                    'category_type': row['category__category_type'],
+                    'description': row['category__description'],
+                    'image': category_image(row['category__image']),
+                },
+                'brand': brand,
+                'product_type': row['product_type'],
+                'image': product_image(row['image']),
+                'image_srcset': product_srcset(row['image']),
+                'in_stock': row['stock'] > 0,
+                'is_featured': row['is_featured'],
+                'is_unique_variant': row['is_unique_variant'],
+                'average_rating': row['rating_sum'] / row['rating_count'] if row['rating_count'] else None,
+                'rating_count': row['rating_count'],
+            })
+        return rows
@@ -0,0 +1,133 @@
+"""
+Queryset planning from serializers.
+
+plan_queryset() walks the fields of the serializer a view is about to use
+and derives the select_related / prefetch_related / only() calls it needs:
+
+- nested single serializers on a forward relation  -> select_related
+- nested many=True serializers on a reverse/m2m relation -> Prefetch with
+  its own planned queryset
+- plain model fields (including dotted sources like 'user.username')
+  -> only() columns
+
+Fields backed by properties or SerializerMethodFields cannot be inspected,
+so serializers declare what they read in a `query_dependencies` dict
+(field name -> list of ORM paths). A field with neither a model source nor
+a declared dependency makes the planner load every column of that model,
+which is always safe.
+"""
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+
+class QueryPlan:
+    def __init__(self, model):
+        self.model = model
+        self.select_related = set()
+        self.prefetches = {}
+        self.only = set()
+
+    def apply(self, queryset):
+        if self.select_related:
+            queryset = queryset.select_related(*sorted(self.select_related))
+        if self.prefetches:
+            queryset = queryset.prefetch_related(*self.prefetches.values())
+        if self.only:
+            queryset = queryset.only(*sorted(self.only))
+        return queryset
+
+
+def plan_queryset(queryset, serializer_class, extra_fields=()):
+    """Return queryset shaped for serializing with serializer_class."""
+    plan = QueryPlan(queryset.model)
+    _collect(plan, serializer_class(), queryset.model, prefix='')
+    for path in extra_fields:
+        _add_path(plan, queryset.model, path, prefix='')
+    return plan.apply(queryset)
+
+
+def _concrete_field_names(model):
+    return [field.name for field in model._meta.concrete_fields]
+
+
+def _load_all(plan, model, prefix):
+    for name in _concrete_field_names(model):
+        plan.only.add(prefix + name)
+
+
+def _add_path(plan, model, path, prefix, skip_relation=None):
+    """Add an ORM path like 'product__price' (joined by select_related)."""
+    parts = path.split('__')
+    if skip_relation and parts[0] == skip_relation:
+        # Filled in by the parent prefetch, no join needed
+        plan.only.add(prefix + parts[0])
+        return
+    current_model = model
+    current_prefix = prefix
+    for index, part in enumerate(parts):
+        try:
+            field = current_model._meta.get_field(part)
+        except FieldDoesNotExist:
+            _load_all(plan, current_model, current_prefix)
+            return
+        if field.is_relation and (field.many_to_one or field.one_to_one) and field.concrete:
+            plan.only.add(current_prefix + part)
+            if index == len(parts) - 1:
+                return
+            plan.select_related.add(current_prefix + part)
+            current_model = field.related_model
+            current_prefix = f'{current_prefix}{part}__'
+        elif field.is_relation:
+            # Multi-valued relations are read through their own query
+            return
+        else:
+            plan.only.add(current_prefix + part)
+            return
+
+
+def _collect(plan, serializer, model, prefix, skip_relation=None):
+    dependencies = getattr(serializer, 'query_dependencies', {})
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if name in dependencies:
+            for path in dependencies[name]:
+                _add_path(plan, model, path, prefix, skip_relation)
+            continue
+
+        source = field.source.replace('.', '__') if field.source != '*' else None
+        if source is None:
+            _load_all(plan, model, prefix)
+            continue
+        relation_name = source.split('__')[0]
+        try:
+            model_field = model._meta.get_field(relation_name)
+        except FieldDoesNotExist:
+            _load_all(plan, model, prefix)
+            continue
+
+        if isinstance(field, serializers.ListSerializer) and model_field.is_relation:
+            _plan_prefetch(plan, field.child, model_field, prefix + relation_name)
+        elif isinstance(field, serializers.BaseSerializer) and model_field.is_relation:
+            if skip_relation == relation_name:
+                plan.only.add(prefix + relation_name)
+                continue
+            plan.only.add(prefix + relation_name)
+            plan.select_related.add(prefix + relation_name)
+            _collect(plan, field, model_field.related_model, f'{prefix}{relation_name}__')
+        else:
+            _add_path(plan, model, source, prefix, skip_relation)
+
+
+def _plan_prefetch(plan, child_serializer, relation, path):
+    related_model = relation.related_model
+    child_plan = QueryPlan(related_model)
+    back_reference = None
+    if relation.one_to_many:
+        # Django sets child.<fk> to the parent instance while prefetching
+        back_reference = relation.field.name
+        child_plan.only.add(back_reference)
+    _collect(child_plan, child_serializer, related_model, prefix='', skip_relation=back_reference)
+    plan.prefetches[path] = Prefetch(path, queryset=child_plan.apply(related_model._default_manager.all()))
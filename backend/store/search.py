@@ -0,0 +1,170 @@
+"""
+Product search index.
+
+Products are tokenized into ProductSearchToken rows (an inverted index kept in
+the regular database, so it works the same on MySQL and SQLite). Each token
+carries a weight summed from the fields it appears in, so a match in the
+product name ranks above a match in the brand or description.
+
+A query matches products that contain every term as a whole token, except
+the last term, which may be the start of a token ("galaxy s2" finds
+"Galaxy S24"), so partially typed words and the substring-style `?search=`
+keep working.
+"""
+
+import re
+from django.db import transaction
+from django.db.models import Count, OuterRef, Q, Subquery, Sum, Value
+from rest_framework.filters import BaseFilterBackend
+from .models import Product, ProductSearchToken
+
+# Relative weight of a token depending on the field it was found in
+FIELD_WEIGHTS = {
+    'name': 8,
+    'brand': 4,
+    'description': 1,
+}
+
+TOKEN_MAX_LENGTH = 50
+MIN_TOKEN_LENGTH = 2
+MAX_QUERY_TERMS = 8
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+HTML_TAG_RE = re.compile(r'<[^>]+>')
+
+
+def tokenize(text):
+    """Split text into lowercase alphanumeric tokens, dropping very short ones."""
+    if not text:
+        return []
+    text = HTML_TAG_RE.sub(' ', text.lower())
+    return [
+        token[:TOKEN_MAX_LENGTH]
+        for token in TOKEN_RE.findall(text)
+        if len(token) >= MIN_TOKEN_LENGTH
+    ]
+
+
+def build_tokens(product):
+    """Return {token: weight} for a product. Each field counts once per token."""
+    fields = {
+        'name': product.name,
+        'brand': product.brand.name if product.brand_id else '',
+        'description': product.description,
+    }
+    weights = {}
+    for field, text in fields.items():
+        for token in set(tokenize(text)):
+            weights[token] = weights.get(token, 0) + FIELD_WEIGHTS[field]
+    return weights
+
+
+def index_product(product):
+    """Replace the index rows of a single product."""
+    with transaction.atomic():
+        ProductSearchToken.objects.filter(product=product).delete()
+        ProductSearchToken.objects.bulk_create([
+            ProductSearchToken(product=product, token=token, weight=weight)
+            for token, weight in build_tokens(product).items()
+        ])
+
+
+def index_products(queryset, batch_size=500):
+    """Rebuild index rows for every product in queryset. Returns products indexed."""
+    queryset = queryset.select_related('brand').only('id', 'name', 'description', 'brand__name').order_by('pk')
+    indexed = 0
+    last_pk = 0
+    while True:
+        batch = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            break
+        with transaction.atomic():
+            ProductSearchToken.objects.filter(product__in=[p.pk for p in batch]).delete()
+            ProductSearchToken.objects.bulk_create([
+                ProductSearchToken(product=product, token=token, weight=weight)
+                for product in batch
+                for token, weight in build_tokens(product).items()
+            ], batch_size=1000)
+        indexed += len(batch)
+        last_pk = batch[-1].pk
+    return indexed
+
+
+def query_terms(query):
+    """
+    Split a search query into (whole terms, prefix): the last term is
+    matched as a token prefix and may be a single character; earlier terms
+    shorter than MIN_TOKEN_LENGTH are not indexed and so are ignored.
+    """
+    terms = [token[:TOKEN_MAX_LENGTH] for token in TOKEN_RE.findall(query.lower())][:MAX_QUERY_TERMS]
+    if not terms:
+        return [], None
+    *whole, prefix = terms
+    whole = [term for term in dict.fromkeys(whole) if len(term) >= MIN_TOKEN_LENGTH and term != prefix]
+    return whole, prefix
+
+
+def search_products(queryset, query):
+    """
+    Filter queryset to products matching every term in query and annotate
+    each with a `search_rank` (sum of matched token weights).
+    """
+    whole, prefix = query_terms(query)
+    if prefix is None:
+        return queryset.annotate(search_rank=Value(0)).none()
+    matched = Q(token__startswith=prefix)
+    counts = {'prefixed': Count('token', filter=Q(token__startswith=prefix))}
+    required = {'prefixed__gte': 1}
+    if whole:
+        matched |= Q(token__in=whole)
+        counts['whole'] = Count('token', filter=Q(token__in=whole))
+        required['whole'] = len(whole)
+    # Match and rank on the narrow token table (driven by the token index)
+    # instead of grouping the wide product rows
+    matches = (
+        ProductSearchToken.objects
+        .filter(matched)
+        .values('product')
+        .annotate(**counts)
+        .filter(**required)
+        .values('product')
+    )
+    ranks = (
+        ProductSearchToken.objects
+        .filter(matched, product=OuterRef('pk'))
+        .values('product')
+        .annotate(rank=Sum('weight'))
+        .values('rank')
+    )
+    return queryset.filter(pk__in=matches).annotate(search_rank=Subquery(ranks))
+
+
+class ProductSearchFilter(BaseFilterBackend):
+    """
+    Ranked full-text search over the product index using `?q=` (or the
+    legacy `?search=`). Results are ordered by relevance unless the client
+    asked for an explicit `?ordering=`, so place this after OrderingFilter.
+    """
+    search_params = ['q', 'search']
+    ordering_param = 'ordering'
+
+    def get_search_query(self, request):
+        for param in self.search_params:
+            value = request.query_params.get(param, '').strip()
+            if value:
+                return value
+        return ''
+
+    def filter_queryset(self, request, queryset, view):
+        query = self.get_search_query(request)
+        if not query:
+            return queryset
+        queryset = search_products(queryset, query)
+        if not request.query_params.get(self.ordering_param):
+            queryset = queryset.order_by('-search_rank', *getattr(view, 'ordering', []) or ['-pk'])
+        return queryset
+
+
+def reindex_brand(brand):
+    """Reindex every product of a brand after its name changed."""
+    return index_products(Product.objects.filter(brand=brand))
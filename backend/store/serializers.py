@@ -7,10 +7,20 @@ from .models import (
     EducationTablet, TabletSoftware, SchoolTabletOrder, SchoolTabletOrderItem,
     Cart, CartItem, Order, OrderItem, HeroSlide, TradeInRequest, Employer, Bank, School, Policy
 )
+from .images import ImageSrcsetField
 
 
 # ============ POLICY SERIALIZER ============
 
+# Columns read by Product properties, for store.querysets.plan_queryset
+PRODUCT_PROPERTY_DEPENDENCIES = {
+    'current_price': ['price', 'sale_price'],
+    'in_stock': ['stock'],
+    'average_rating': ['rating_sum', 'rating_count'],
+    'rating_histogram': [f'rating_{i}_count' for i in range(1, 6)],
+}
+
+
 class PolicySerializer(serializers.ModelSerializer):
     policy_type_display = serializers.CharField(source='get_policy_type_display', read_only=True)
     
@@ -30,9 +40,11 @@ class EmployerSerializer(serializers.ModelSerializer):
 # ============ BANK SERIALIZER ============
 
 class BankSerializer(serializers.ModelSerializer):
+    logo_srcset = ImageSrcsetField(source='logo')
+
     class Meta:
         model = Bank
-        fields = ['id', 'name', 'code', 'logo', 'branch']
+        fields = ['id', 'name', 'code', 'logo', 'logo_srcset', 'branch']
 
 
 # ============ SCHOOL SERIALIZER ============
@@ -46,13 +58,15 @@ class SchoolSerializer(serializers.ModelSerializer):
 # ============ HERO SLIDE SERIALIZER ============
 
 class HeroSlideSerializer(serializers.ModelSerializer):
+    image_srcset = ImageSrcsetField(source='image')
+
     class Meta:
         model = HeroSlide
         fields = [
             'id', 'title', 'highlight', 'badge_text', 'description',
             'primary_button_text', 'primary_button_link',
             'secondary_button_text', 'secondary_button_link',
-            'image', 'card_icon', 'card_label', 'card_price', 'card_subtext',
+            'image', 'image_srcset', 'card_icon', 'card_label', 'card_price', 'card_subtext',
             'background_color', 'order', 'is_active'
         ]
 
@@ -60,9 +74,11 @@ class HeroSlideSerializer(serializers.ModelSerializer):
 # ============ BASE SERIALIZERS ============
 
 class BrandSerializer(serializers.ModelSerializer):
+    logo_srcset = ImageSrcsetField(source='logo')
+
     class Meta:
         model = Brand
-        fields = ['id', 'name', 'slug', 'logo']
+        fields = ['id', 'name', 'slug', 'logo', 'logo_srcset']
 
 
 class CategorySerializer(serializers.ModelSerializer):
@@ -72,21 +88,22 @@ class CategorySerializer(serializers.ModelSerializer):
 
 
 class ProductImageSerializer(serializers.ModelSerializer):
+    image_srcset = ImageSrcsetField(source='image')
+
     class Meta:
         model = ProductImage
-        fields = ['id', 'image', 'alt_text', 'is_primary']
+        fields = ['id', 'image', 'image_srcset', 'alt_text', 'is_primary']
 
 
 class ProductVariantSerializer(serializers.ModelSerializer):
-    final_price = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
-    
     class Meta:
         model = ProductVariant
         fields = ['id', 'name', 'storage', 'color', 'ram', 'price_adjustment', 'stock', 'sku', 'final_price']
 
 
 class ReviewSerializer(serializers.ModelSerializer):
-    user = serializers.StringRelatedField(read_only=True)
+    # Read from a select_related('user') join rather than User.__str__ per row
+    user = serializers.CharField(source='user.username', read_only=True)
 
     class Meta:
         model = Review
@@ -99,13 +116,16 @@ class ProductListSerializer(serializers.ModelSerializer):
     brand = BrandSerializer(read_only=True)
     current_price = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
     in_stock = serializers.BooleanField(read_only=True)
+    average_rating = serializers.FloatField(read_only=True)
+    image_srcset = ImageSrcsetField(source='image')
+    query_dependencies = PRODUCT_PROPERTY_DEPENDENCIES
 
     class Meta:
         model = Product
         fields = [
             'id', 'name', 'slug', 'price', 'sale_price', 'current_price',
-            'category', 'brand', 'product_type', 'image', 'in_stock', 
-            'is_featured', 'is_unique_variant'
+            'category', 'brand', 'product_type', 'image', 'image_srcset', 'in_stock', 
+            'is_featured', 'is_unique_variant', 'average_rating', 'rating_count'
         ]
 
 
@@ -114,25 +134,30 @@ class ProductDetailSerializer(serializers.ModelSerializer):
     brand = BrandSerializer(read_only=True)
     images = ProductImageSerializer(many=True, read_only=True)
     variants = ProductVariantSerializer(many=True, read_only=True)
-    reviews = ReviewSerializer(many=True, read_only=True)
+    reviews = serializers.SerializerMethodField()
     current_price = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
     in_stock = serializers.BooleanField(read_only=True)
-    average_rating = serializers.SerializerMethodField()
+    average_rating = serializers.FloatField(read_only=True)
+    rating_histogram = serializers.DictField(child=serializers.IntegerField(), read_only=True)
+    image_srcset = ImageSrcsetField(source='image')
+    query_dependencies = dict(PRODUCT_PROPERTY_DEPENDENCIES, reviews=[])
 
     class Meta:
         model = Product
         fields = [
             'id', 'name', 'slug', 'description', 'specifications', 'price', 'sale_price',
-            'current_price', 'category', 'brand', 'product_type', 'image', 'images', 
+            'current_price', 'category', 'brand', 'product_type', 'image', 'image_srcset', 'images', 
             'variants', 'stock', 'in_stock', 'is_featured', 'is_unique_variant',
-            'reviews', 'average_rating', 'created_at', 'updated_at'
+            'reviews', 'average_rating', 'rating_count', 'rating_histogram',
+            'created_at', 'updated_at'
         ]
 
-    def get_average_rating(self, obj):
-        reviews = obj.reviews.all()
-        if reviews:
-            return sum(r.rating for r in reviews) / len(reviews)
-        return None
+    # Only the newest reviews are embedded; the rest are paged from /products/{slug}/reviews/
+    EMBEDDED_REVIEWS = 5
+
+    def get_reviews(self, obj):
+        reviews = obj.reviews.select_related('user').order_by('-created_at', '-pk')[:self.EMBEDDED_REVIEWS]
+        return ReviewSerializer(reviews, many=True).data
 
 
 # ============ MSME FINANCING SERIALIZERS ============
@@ -235,10 +260,12 @@ class EnterpriseOrderCreateSerializer(serializers.ModelSerializer):
 # ============ EDUCATION SERIALIZERS ============
 
 class EducationBoardSerializer(serializers.ModelSerializer):
+    image_srcset = ImageSrcsetField(source='image')
+
     class Meta:
         model = EducationBoard
         fields = [
-            'id', 'name', 'slug', 'description', 'image', 'price',
+            'id', 'name', 'slug', 'description', 'image', 'image_srcset', 'price',
             'installation_included', 'specifications', 'is_active'
         ]
 
@@ -344,11 +371,13 @@ class FundraiserCreateSerializer(serializers.ModelSerializer):
 
 
 class EducationTabletSerializer(serializers.ModelSerializer):
+    image_srcset = ImageSrcsetField(source='image')
+
     class Meta:
         model = EducationTablet
         fields = [
             'id', 'name', 'slug', 'brand', 'size', 'description',
-            'specifications', 'image', 'price', 'stock', 'is_active'
+            'specifications', 'image', 'image_srcset', 'price', 'stock', 'is_active'
         ]
 
 
@@ -411,6 +440,15 @@ class CartSerializer(serializers.ModelSerializer):
         fields = ['id', 'cart_id', 'items', 'total', 'item_count']
 
 
+class GuestCartSerializer(serializers.Serializer):
+    """CartSerializer output for a session-backed store.carts.GuestCart (id and cart_id are null)"""
+    id = serializers.ReadOnlyField()
+    cart_id = serializers.ReadOnlyField()
+    items = CartItemSerializer(many=True, read_only=True)
+    total = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+    item_count = serializers.IntegerField(read_only=True)
+
+
 class CartItemCreateSerializer(serializers.Serializer):
     product_id = serializers.IntegerField(required=False)
     variant_id = serializers.IntegerField(required=False, allow_null=True)
@@ -425,11 +463,40 @@ class CartItemCreateSerializer(serializers.Serializer):
         return data
 
 
+class CartItemUpdateSerializer(serializers.Serializer):
+    quantity = serializers.IntegerField(min_value=0, default=1)  # 0 removes the line
+
+
+class CartOperationSerializer(serializers.Serializer):
+    """One step of a bulk cart update: add an item, set a line's quantity (0 removes it) or remove a line"""
+    op = serializers.ChoiceField(choices=['add', 'set', 'remove'])
+    item_id = serializers.IntegerField(required=False)
+    product_id = serializers.IntegerField(required=False)
+    variant_id = serializers.IntegerField(required=False, allow_null=True)
+    education_tablet_id = serializers.IntegerField(required=False)
+    quantity = serializers.IntegerField(min_value=0, default=1)
+
+    def validate(self, data):
+        if data['op'] == 'add':
+            if data['quantity'] < 1:
+                raise serializers.ValidationError("Quantity must be at least 1")
+            if bool(data.get('product_id')) == bool(data.get('education_tablet_id')):
+                raise serializers.ValidationError("Exactly one of product_id or education_tablet_id is required")
+        elif 'item_id' not in data:
+            raise serializers.ValidationError("item_id is required")
+        return data
+
+
+class CartBulkSerializer(serializers.Serializer):
+    operations = CartOperationSerializer(many=True, allow_empty=False, max_length=100)
+
+
 class OrderItemSerializer(serializers.ModelSerializer):
     product = ProductListSerializer(read_only=True)
     variant = ProductVariantSerializer(read_only=True)
     education_tablet = EducationTabletSerializer(read_only=True)
     total_price = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
+    query_dependencies = {'total_price': ['unit_price', 'quantity']}
     
     class Meta:
         model = OrderItem
@@ -450,6 +517,57 @@ class OrderSerializer(serializers.ModelSerializer):
         read_only_fields = ['order_id', 'subtotal', 'total', 'status', 'payment_status', 'tracking_number']
 
 
+ORDER_THUMBNAILS = 4
+
+
+class OrderThumbnailListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        return super().to_representation(data)[:ORDER_THUMBNAILS]
+
+
+class OrderThumbnailSerializer(serializers.ModelSerializer):
+    """Name and image of an order line, for order history lists"""
+    name = serializers.SerializerMethodField()
+    image = serializers.SerializerMethodField()
+    query_dependencies = {
+        'name': ['product__name', 'education_tablet__name'],
+        'image': ['product__image', 'education_tablet__image'],
+    }
+
+    class Meta:
+        model = OrderItem
+        fields = ['name', 'image']
+        list_serializer_class = OrderThumbnailListSerializer
+
+    def get_name(self, item):
+        return item.education_tablet.name if item.education_tablet_id else item.product.name
+
+    def get_image(self, item):
+        image = item.education_tablet.image if item.education_tablet_id else item.product.image
+        if not image:
+            return None
+        request = self.context.get('request')
+        return request.build_absolute_uri(image.url) if request else image.url
+
+
+class OrderSummarySerializer(serializers.ModelSerializer):
+    """Compact order for the order list; OrderSerializer has the full lines"""
+    item_count = serializers.SerializerMethodField()
+    thumbnails = OrderThumbnailSerializer(source='items', many=True, read_only=True)
+    query_dependencies = {'item_count': []}  # counts the lines prefetched for thumbnails
+
+    class Meta:
+        model = Order
+        fields = [
+            'id', 'order_id', 'town', 'subtotal', 'shipping_cost', 'total',
+            'status', 'payment_status', 'tracking_number',
+            'item_count', 'thumbnails', 'created_at'
+        ]
+
+    def get_item_count(self, order):
+        return len(order.items.all())
+
+
 class OrderCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Order
@@ -0,0 +1,146 @@
+"""
+Signal handlers for the store app. Connected in StoreConfig.ready().
+"""
+
+from copy import copy
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from .models import (
+    Brand, Category, EducationTablet, EnterpriseBundle, HeroSlide, Product, ProductImage, ProductVariant, Review
+)
+from .cache import bump_generation
+from . import attributes, images, search, suggest
+
+# Models whose changes invalidate cached catalog payloads (facets, anonymous responses, homepage)
+CACHE_GENERATION_MODELS = [
+    Product, ProductVariant, ProductImage, Review, Brand, Category, EducationTablet, EnterpriseBundle, HeroSlide,
+]
+
+
+@receiver(post_save, sender=Product)
+def index_product_on_save(sender, instance, raw=False, **kwargs):
+    """Keep the product search index in sync with name/description/brand edits"""
+    if raw:
+        return
+    search.index_product(instance)
+
+
+@receiver(post_save, sender=Brand)
+def reindex_brand_products(sender, instance, created, raw=False, **kwargs):
+    """A renamed brand changes the tokens of all its products"""
+    if raw or created:
+        return
+    search.reindex_brand(instance)
+
+
+@receiver(post_save, sender=Product)
+def index_attributes_on_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Re-parse specification attributes when the text they come from may have changed"""
+    if raw or (update_fields is not None and not {'specifications', 'description'} & set(update_fields)):
+        return
+    attributes.index_product_attributes(instance)
+
+
+@receiver(post_save, sender=ProductVariant)
+def index_attributes_on_variant_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    attributes.index_product_attributes(instance.product)
+
+
+@receiver(post_delete, sender=ProductVariant)
+def index_attributes_on_variant_delete(sender, instance, origin=None, **kwargs):
+    # Skip cascades from a product (or category) delete: the product is going away too
+    if getattr(origin, 'model', type(origin)) is not ProductVariant:
+        return
+    attributes.index_product_attributes(instance.product)
+
+
+@receiver(post_save, sender=Review)
+def update_rating_summary_on_save(sender, instance, created, raw=False, **kwargs):
+    """New reviews are folded in with an atomic increment; edits recompute"""
+    if raw:
+        return
+    product = Product(pk=instance.product_id)
+    if created:
+        product.add_rating(instance.rating)
+    else:
+        product.refresh_rating_summary()
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_summary_on_delete(sender, instance, origin=None, **kwargs):
+    # Skip cascades: a deleted product needs no summary, a deleted user's
+    # products are refreshed once each below
+    if getattr(origin, 'model', type(origin)) is not Review:
+        return
+    Product(pk=instance.product_id).refresh_rating_summary()
+
+
+@receiver(pre_delete, sender=User)
+def remember_reviewed_products(sender, instance, **kwargs):
+    instance._reviewed_product_ids = set(Review.objects.filter(user=instance).values_list('product_id', flat=True))
+
+
+@receiver(post_delete, sender=User)
+def update_rating_summaries_on_user_delete(sender, instance, **kwargs):
+    for product_id in getattr(instance, '_reviewed_product_ids', ()):
+        Product(pk=product_id).refresh_rating_summary()
+
+
+def generate_image_derivatives(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Create responsive sizes of a newly saved image (existing ones are left alone)"""
+    field_name = IMAGE_DERIVATIVE_FIELDS[sender]
+    if raw or (update_fields is not None and field_name not in update_fields):
+        return
+    images.generate_derivatives(getattr(instance, field_name).name)
+
+
+IMAGE_DERIVATIVE_FIELDS = {apps.get_model(label): field_name for label, field_name in images.IMAGE_FIELDS}
+for model in IMAGE_DERIVATIVE_FIELDS:
+    post_save.connect(
+        generate_image_derivatives, sender=model, dispatch_uid=f'image_derivatives_{model.__name__}'
+    )
+
+
+def bump_cache_generation(sender, **kwargs):
+    """
+    Invalidate cached payloads derived from the changed model once the change
+    is committed; bumping earlier would let a concurrent request cache the
+    old rows under the new generation.
+    """
+    transaction.on_commit(lambda: bump_generation(sender))
+
+
+for model in CACHE_GENERATION_MODELS:
+    post_save.connect(bump_cache_generation, sender=model, dispatch_uid=f'bump_generation_save_{model.__name__}')
+    post_delete.connect(bump_cache_generation, sender=model, dispatch_uid=f'bump_generation_delete_{model.__name__}')
+
+
+# Connected after the generation bumps above, so their on_commit callbacks run first,
+# which suggest.SuggestIndex.update() relies on
+@receiver(post_save, sender=Product, dispatch_uid='suggest_product_save')
+def update_suggestions_on_product_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        transaction.on_commit(lambda: suggest.product_changed(instance))
+
+
+@receiver(post_delete, sender=Product, dispatch_uid='suggest_product_delete')
+def update_suggestions_on_product_delete(sender, instance, **kwargs):
+    deleted = copy(instance)  # the delete clears instance.pk before the callback runs
+    transaction.on_commit(lambda: suggest.product_changed(deleted, deleted=True))
+
+
+@receiver(post_save, sender=Brand, dispatch_uid='suggest_brand_save')
+def update_suggestions_on_brand_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        transaction.on_commit(lambda: suggest.brand_changed(instance))
+
+
+@receiver(post_delete, sender=Brand, dispatch_uid='suggest_brand_delete')
+def update_suggestions_on_brand_delete(sender, instance, **kwargs):
+    deleted = copy(instance)
+    transaction.on_commit(lambda: suggest.brand_changed(deleted, deleted=True))
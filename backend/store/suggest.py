@@ -0,0 +1,129 @@
+"""
+In-process typeahead index over product and brand names.
+
+Every name is stored once per word position ("samsung galaxy s24",
+"galaxy s24", "s24") in one sorted list of (key, kind, id) tuples, so a
+prefix lookup is a bisect plus a short forward scan and never touches the
+database.
+
+The index is built lazily on first use and patched in place from the
+Product / Brand signals (store.signals). Each process keeps its own copy;
+it remembers the Product and Brand cache generations it reflects, so a
+change made by another worker, a bulk update or a rebuild command (anything
+that bumps a generation without going through this process' signals) makes
+the next lookup rebuild it.
+"""
+
+import threading
+from bisect import bisect_left, insort
+from .cache import get_generation, get_generations
+from .models import Brand, Product
+from .search import TOKEN_RE
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 20
+
+
+def normalize(text):
+    """Lowercase words joined by single spaces ('Galaxy  S24-Ultra' -> 'galaxy s24 ultra')."""
+    return ' '.join(TOKEN_RE.findall((text or '').lower()))
+
+
+def name_keys(name):
+    """One key per word position, so a prefix can match any word of the name."""
+    words = normalize(name).split()
+    return [' '.join(words[i:]) for i in range(len(words))]
+
+
+class SuggestIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = None  # sorted [(key, kind, id)]
+        self._items = {}  # (kind, id) -> suggestion dict
+        self._generations = None
+
+    def _current_generations(self):
+        return tuple(get_generations([Product, Brand]))
+
+    def _rows(self):
+        products = Product.objects.filter(is_active=True).values_list('id', 'name', 'slug')
+        brands = Brand.objects.values_list('id', 'name', 'slug')
+        return [('product', row) for row in products] + [('brand', row) for row in brands]
+
+    def rebuild(self):
+        generations = self._current_generations()
+        entries, items = [], {}
+        for kind, (pk, name, slug) in self._rows():
+            items[(kind, pk)] = {'type': kind, 'name': name, 'slug': slug}
+            entries.extend((key, kind, pk) for key in name_keys(name))
+        entries.sort()
+        with self._lock:
+            self._entries, self._items, self._generations = entries, items, generations
+
+    def ensure_current(self):
+        if self._entries is None or self._generations != self._current_generations():
+            self.rebuild()
+
+    def suggest(self, prefix, limit=DEFAULT_LIMIT):
+        """Up to `limit` products/brands with a name word starting with `prefix`."""
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        self.ensure_current()
+        entries, items = self._entries, self._items
+        results, seen = [], set()
+        index = bisect_left(entries, (prefix,))
+        while index < len(entries) and len(results) < limit:
+            key, kind, pk = entries[index]
+            if not key.startswith(prefix):
+                break
+            if (kind, pk) not in seen:
+                seen.add((kind, pk))
+                results.append(items[(kind, pk)])
+            index += 1
+        return results
+
+    def update(self, kind, pk, name=None, slug=None, model=None):
+        """
+        Replace the entries of one object (name=None removes it). Called after
+        the generation bump of the same save, so the index stays current when
+        that bump is the only change it has not seen.
+        """
+        if self._entries is None:
+            return  # Not built yet; the first lookup builds it from the database
+        with self._lock:
+            old = self._items.pop((kind, pk), None)
+            if old is not None:
+                for key in name_keys(old['name']):
+                    position = bisect_left(self._entries, (key, kind, pk))
+                    if position < len(self._entries) and self._entries[position] == (key, kind, pk):
+                        del self._entries[position]
+            if name is not None:
+                self._items[(kind, pk)] = {'type': kind, 'name': name, 'slug': slug}
+                for key in name_keys(name):
+                    insort(self._entries, (key, kind, pk))
+
+            if self._generations is None:
+                return
+            slot = 0 if model is Product else 1
+            generations = list(self._generations)
+            current = get_generation(model)
+            if current == generations[slot] + 1:
+                generations[slot] = current
+                self._generations = tuple(generations)
+            else:
+                self._generations = None  # Missed other changes, rebuild on next lookup
+
+
+suggest_index = SuggestIndex()
+
+
+def product_changed(product, deleted=False):
+    active = product.is_active and not deleted
+    suggest_index.update(
+        'product', product.pk, product.name if active else None, product.slug, model=Product
+    )
+
+
+def brand_changed(brand, deleted=False):
+    suggest_index.update('brand', brand.pk, None if deleted else brand.name, brand.slug, model=Brand)
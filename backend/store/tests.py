@@ -1,3 +1,1128 @@
-from django.test import TestCase
+import json
+import shutil
+import tempfile
+import threading
+from base64 import urlsafe_b64encode
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import skipUnless
+import django
+from django.contrib.auth.models import AnonymousUser, User
+from django.contrib.sessions.backends.db import SessionStore
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient, APIRequestFactory
+from .cache import bump_generation
+from .search import tokenize
+from .images import DERIVATIVE_WIDTHS, derivative_name, generate_derivatives
+from .inventory import holder_for
+from .models import (
+    Brand, Cart, CartItem, Category, EducationTablet, HeroSlide, Order, OrderItem, Product, ProductAttribute, ProductImage,
+    Fundraiser, IdempotencyKey, ProductVariant, Review, StockReservation,
+)
 
-# Create your tests here.
+
+def create_catalog(count=5):
+    brand = Brand.objects.create(name='Samsung', slug='samsung')
+    category = Category.objects.create(name='Phones', slug='phones')
+    products = []
+    for i in range(count):
+        product = Product.objects.create(
+            name=f'Galaxy {i}', slug=f'galaxy-{i}', brand=brand, category=category,
+            description='Phone', price=Decimal('1000'), image='products/p.jpg', stock=5,
+        )
+        ProductVariant.objects.create(
+            product=product, name='128GB', sku=f'sku-{i}', price_adjustment=Decimal('50'), stock=5
+        )
+        ProductImage.objects.create(product=product, image='products/p.jpg')
+        products.append(product)
+    return products
+
+
+class ProductQueryCountTests(TestCase):
+    """
+    Each product action runs a fixed number of queries regardless of catalog size.
+    Counts are for a cold cache and include the ETag validator aggregate.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.products = create_catalog()
+        for i in range(3):
+            user = User.objects.create_user(f'reviewer{i}')
+            Review.objects.create(product=cls.products[0], user=user, rating=4, comment='Good')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_list(self):
+        # validator + COUNT + page; no variant/image/review prefetches for list rows
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/products/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 5)
+
+    def test_list_cursor(self):
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/products/?pagination=cursor')
+        self.assertEqual(len(response.data['results']), 5)
+
+    def test_list_query_count_independent_of_row_count(self):
+        product = Product.objects.first()
+        for i in range(5):
+            product.pk = None
+            product.slug = f'extra-{i}'
+            product.save()
+        with self.assertNumQueries(3):
+            self.client.get('/api/products/')
+
+    def test_retrieve(self):
+        # validator + product + variants + images + newest reviews
+        with self.assertNumQueries(5):
+            response = self.client.get(f'/api/products/{self.products[0].slug}/')
+        self.assertEqual(len(response.data['variants']), 1)
+        self.assertEqual(len(response.data['reviews']), 3)
+        self.assertEqual(response.data['variants'][0]['final_price'], '1050.00')
+
+    def test_reviews(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(f'/api/products/{self.products[0].slug}/reviews/')
+        self.assertEqual(len(response.data['results']), 3)
+
+    def test_facets(self):
+        with self.assertNumQueries(1):
+            self.client.get('/api/products/facets/')
+
+
+class ProductListProjectionTests(TestCase):
+    """The .values() list fast path renders exactly what ProductListSerializer does."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.products = create_catalog(3)
+        product = cls.products[0]
+        product.sale_price = Decimal('899.5')
+        product.image = 'products/with space.jpg'
+        product.save()
+        Product.objects.filter(pk=cls.products[1].pk).update(brand=None, stock=0)
+        Review.objects.create(product=product, user=User.objects.create_user('reviewer'), rating=5, comment='Great')
+        Category.objects.filter(pk=product.category_id).update(image='categories/c.jpg')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_matches_serializer_output(self):
+        from rest_framework.renderers import JSONRenderer
+        from rest_framework.request import Request
+        from rest_framework.test import APIRequestFactory
+        from .projections import ProductListProjectionSerializer, product_list_values
+        from .serializers import ProductListSerializer
+
+        request = Request(APIRequestFactory().get('/api/products/'))
+        queryset = Product.objects.order_by('pk')
+        expected = ProductListSerializer(queryset, many=True, context={'request': request}).data
+        actual = ProductListProjectionSerializer(list(product_list_values(queryset)), context={'request': request}).data
+        self.assertEqual(JSONRenderer().render(actual), JSONRenderer().render(expected))
+
+    def test_cursor_and_page_modes_agree(self):
+        client = APIClient()
+        paged = client.get('/api/products/')
+        cursor = client.get('/api/products/?pagination=cursor')
+        self.assertEqual(cursor.data['results'], paged.data['results'])
+
+
+class EffectivePriceTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.products = create_catalog(3)
+        cheap = cls.products[2]
+        cheap.sale_price = Decimal('500')
+        cheap.save()
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_price_filter_uses_sale_price(self):
+        response = self.client.get('/api/products/?max_price=600')
+        self.assertEqual([row['slug'] for row in response.data['results']], ['galaxy-2'])
+
+    def test_ordering_by_price(self):
+        response = self.client.get('/api/products/?ordering=price')
+        self.assertEqual(response.data['results'][0]['slug'], 'galaxy-2')
+
+    def test_variant_final_price_follows_product_price(self):
+        product = self.products[0]
+        product.price = Decimal('1200')
+        product.save(update_fields=['price'])
+        variant = product.variants.get()
+        self.assertEqual(product.effective_price, Decimal('1200'))
+        self.assertEqual(variant.final_price, Decimal('1250'))
+        variant.price_adjustment = Decimal('100')
+        variant.save()
+        self.assertEqual(ProductVariant.objects.get(pk=variant.pk).final_price, Decimal('1300'))
+
+    def test_cursor_pages_follow_price_ordering(self):
+        for i in range(12):
+            Product.objects.create(
+                name=f'Extra {i}', slug=f'extra-{i}', category=self.products[0].category,
+                description='Phone', price=Decimal(2000 + i), image='products/p.jpg',
+            )
+        first = self.client.get('/api/products/?pagination=cursor&ordering=-price')
+        second = self.client.get(first.data['next'])
+        prices = [Decimal(row['current_price']) for row in first.data['results'] + second.data['results']]
+        self.assertEqual(len(prices), 15)
+        self.assertEqual(prices, sorted(prices, reverse=True))
+
+
+class KeysetPaginationTests(TestCase):
+    """?pagination=cursor walks every row once, forwards and back, even when created_at ties"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('buyer')
+        Order.objects.bulk_create([
+            Order(
+                user=cls.user, full_name='Buyer', email='buyer@example.com', phone='0700000000',
+                town='Nairobi', address='Street', subtotal=Decimal('0'), total=Decimal('0'),
+            )
+            for _ in range(30)
+        ])
+        Fundraiser.objects.bulk_create([
+            Fundraiser(
+                creator=cls.user, fundraiser_type='single_board', school_name=f'School {i}',
+                school_location='Nairobi', target_amount=Decimal('1000'), share_link=f'school-{i}',
+            )
+            for i in range(30)
+        ])
+        tied = timezone.now()
+        Order.objects.filter(pk__in=Order.objects.order_by('pk').values('pk')[:20]).update(created_at=tied)
+        Fundraiser.objects.update(created_at=tied)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def walk(self, url):
+        pages = [self.client.get(url).data]
+        while pages[-1]['next']:
+            pages.append(self.client.get(pages[-1]['next']).data)
+        back = self.client.get(pages[-1]['previous']).data
+        self.assertEqual(back['results'], pages[-2]['results'])
+        return [row['id'] for page in pages for row in page['results']]
+
+    def test_orders(self):
+        ids = self.walk('/api/orders/?pagination=cursor')
+        self.assertEqual(len(ids), 30)
+        self.assertEqual(ids, list(Order.objects.order_by('-created_at', '-pk').values_list('pk', flat=True)))
+
+    def test_fundraisers(self):
+        ids = self.walk('/api/education/fundraisers/?pagination=cursor')
+        self.assertEqual(sorted(ids), sorted(Fundraiser.objects.values_list('pk', flat=True)))
+
+    def test_malformed_cursor_is_not_found(self):
+        for cursor in [
+            {'v': {'a': 1}, 'id': 1, 'r': 0}, {'v': '2026-01-01T00:00:00', 'id': 'x', 'r': 0},
+            {'v': 'yesterday', 'id': 1, 'r': 0}, [1, 2, 3], 'cursor',
+        ]:
+            encoded = urlsafe_b64encode(json.dumps(cursor).encode()).decode()
+            self.assertEqual(self.client.get(f'/api/orders/?cursor={encoded}').status_code, 404)
+        self.assertEqual(self.client.get('/api/orders/?cursor=%%%').status_code, 404)
+
+
+class RatingSummaryTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.products = create_catalog(2)
+        cls.users = [User.objects.create_user(f'reviewer{i}') for i in range(3)]
+
+    def summary(self, product):
+        product = Product.objects.get(pk=product.pk)
+        return product.rating_count, product.rating_sum, product.rating_histogram
+
+    def review(self, user, rating, product=None):
+        return Review.objects.create(product=product or self.products[0], user=user, rating=rating, comment='Ok')
+
+    def test_create_edit_delete(self):
+        first = self.review(self.users[0], 5)
+        self.review(self.users[1], 3)
+        self.assertEqual(self.summary(self.products[0]), (2, 8, {'1': 0, '2': 0, '3': 1, '4': 0, '5': 1}))
+        first.rating = 1
+        first.save()
+        self.assertEqual(self.summary(self.products[0]), (2, 4, {'1': 1, '2': 0, '3': 1, '4': 0, '5': 0}))
+        first.delete()
+        self.assertEqual(self.summary(self.products[0]), (1, 3, {'1': 0, '2': 0, '3': 1, '4': 0, '5': 0}))
+
+    def test_user_delete_refreshes_each_product_once(self):
+        user = self.users[0]
+        for product in self.products:
+            self.review(user, 4, product)
+        self.review(self.users[1], 2)
+        with CaptureQueriesContext(connection) as queries:
+            user.delete()
+        refreshes = [query for query in queries.captured_queries if query['sql'].startswith('UPDATE "store_product"')]
+        self.assertEqual(len(refreshes), 2)
+        self.assertEqual(self.summary(self.products[0])[:2], (1, 2))
+        self.assertEqual(self.summary(self.products[1])[:2], (0, 0))
+
+    def test_product_delete_skips_refresh(self):
+        for user in self.users:
+            self.review(user, 4)
+        with CaptureQueriesContext(connection) as queries:
+            self.products[0].delete()
+        self.assertFalse([query for query in queries.captured_queries if 'rating_sum' in query['sql']])
+
+    def test_rebuild_rating_summaries(self):
+        self.review(self.users[0], 5)
+        self.review(self.users[1], 4)
+        Product.objects.update(rating_count=9, rating_sum=0)
+        out = StringIO()
+        call_command('rebuild_rating_summaries', stdout=out)
+        self.assertIn('Rebuilt rating summaries for 2 products (1 with reviews)', out.getvalue())
+        self.assertEqual(self.summary(self.products[0])[:2], (2, 9))
+        self.assertEqual(self.summary(self.products[1])[:2], (0, 0))
+
+
+class ProductBatchTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.products = create_catalog(4)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_ids_in_requested_order_skipping_unknown(self):
+        ids = [self.products[2].pk, 99999, self.products[0].pk, self.products[2].pk]
+        with self.assertNumQueries(1):
+            response = self.client.get(f'/api/products/batch/?ids={",".join(map(str, ids))}')
+        self.assertEqual([row['slug'] for row in response.data], ['galaxy-2', 'galaxy-0'])
+
+    def test_slugs(self):
+        response = self.client.get('/api/products/batch/?slugs=galaxy-3,galaxy-1,missing')
+        self.assertEqual([row['slug'] for row in response.data], ['galaxy-3', 'galaxy-1'])
+        self.assertEqual(response.data[0], self.client.get('/api/products/?ordering=-created_at').data['results'][0])
+
+    def test_rejects_oversized_and_invalid_batches(self):
+        ids = ','.join(str(i) for i in range(1, 202))
+        self.assertEqual(self.client.get(f'/api/products/batch/?ids={ids}').status_code, 400)
+        self.assertEqual(self.client.get('/api/products/batch/?ids=1,x').status_code, 400)
+
+
+class AttributeFilterTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.products = create_catalog(3)
+        first, second, _ = cls.products
+        first.specifications = 'RAM: 4GB / Storage: 64GB, 128GB / Chipset: Helio G85'
+        first.save()
+        second.specifications = str({'RAM': '12GB', 'Battery': '5000mAh'})
+        second.save()
+        ProductVariant.objects.create(product=second, name='256GB Black', sku='sku-256', storage='256GB', color='Black')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def slugs(self, query):
+        return sorted(row['slug'] for row in self.client.get(f'/api/products/?{query}').data['results'])
+
+    def test_numeric_and_text_filters(self):
+        self.assertEqual(self.slugs('ram_gb__gte=8'), ['galaxy-1'])
+        self.assertEqual(self.slugs('storage_gb=128'), ['galaxy-0'])
+        self.assertEqual(self.slugs('storage_gb__gte=128&color=black'), ['galaxy-1'])
+        self.assertEqual(self.slugs('battery_mah__gt=4000&ram_gb__lt=8'), [])
+
+    def test_card_slot_is_not_storage(self):
+        product = self.products[2]
+        product.specifications = 'Storage: 128GB, 256GB (expandable up to 1TB via microSD)'
+        product.save()
+        self.assertEqual(self.slugs('storage_gb=256'), ['galaxy-1', 'galaxy-2'])
+        self.assertEqual(self.slugs('storage_gb__gte=512'), [])
+
+    def test_invalid_number(self):
+        self.assertEqual(self.client.get('/api/products/?ram_gb=lots').status_code, 400)
+
+    def test_facets_follow_variant_changes(self):
+        self.assertEqual(self.client.get('/api/products/facets/?storage_gb=256').data['total'], 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.products[1].variants.get(sku='sku-256').delete()
+        self.assertEqual(self.client.get('/api/products/facets/?storage_gb=256').data['total'], 0)
+
+    def test_variant_changes_and_product_delete(self):
+        variant = self.products[1].variants.get(sku='sku-256')
+        variant.delete()
+        self.assertEqual(self.slugs('storage_gb=256'), [])
+        self.products[0].delete()
+        self.assertFalse(ProductAttribute.objects.filter(product_id=self.products[0].pk).exists())
+
+
+class ImageDerivativeTests(TestCase):
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        override = override_settings(MEDIA_ROOT=media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        cache.clear()
+
+    def upload(self, size, mode='RGB'):
+        buffer = BytesIO()
+        Image.new(mode, size).save(buffer, format='PNG')
+        return ContentFile(buffer.getvalue(), name='photo.png')
+
+    def test_derivatives_written_on_save_and_exposed(self):
+        brand = Brand.objects.create(name='Apple', slug='apple', logo=self.upload((300, 100), 'RGBA'))
+        product = create_catalog(1)[0]
+        product.image = self.upload((1600, 1200))
+        product.save()
+
+        with default_storage.open(derivative_name(product.image.name, 400, 'webp')) as file:
+            self.assertEqual(Image.open(file).size, (400, 300))
+        with default_storage.open(derivative_name(brand.logo.name, 800, 'jpeg')) as file:
+            self.assertEqual(Image.open(file).size, (300, 100))  # never upscaled
+
+        row = APIClient().get('/api/products/').data['results'][0]
+        self.assertIn(f'{derivative_name(product.image.name, 200, "webp")} 200w', row['image_srcset']['webp'])
+        self.assertEqual(len(row['image_srcset']['jpeg'].split(', ')), len(DERIVATIVE_WIDTHS))
+
+    def test_missing_original_is_skipped(self):
+        self.assertEqual(generate_derivatives('products/missing.jpg'), 0)
+
+    def test_no_srcset_without_derivatives(self):
+        product = create_catalog(1)[0]  # products/p.jpg was never stored
+        product.image = ContentFile(b'not an image', name='broken.jpg')
+        product.save()
+        row = APIClient().get('/api/products/').data['results'][0]
+        self.assertIsNone(row['image_srcset'])
+        self.assertTrue(row['image'].endswith(product.image.name))
+        detail = APIClient().get(f'/api/products/{product.slug}/').data
+        self.assertIsNone(detail['images'][0]['image_srcset'])
+
+    def test_originals_sharing_a_stem_get_their_own_derivatives(self):
+        jpeg = BytesIO()
+        Image.new('RGB', (600, 300)).save(jpeg, format='JPEG')
+        default_storage.save('products/phone.jpg', ContentFile(jpeg.getvalue()))
+        default_storage.save('products/phone.png', self.upload((600, 600)))
+        self.assertEqual(derivative_name('products/phone.png', 400, 'webp'), 'products/phone_png_w400.webp')
+        self.assertEqual(generate_derivatives('products/phone.jpg'), 8)
+        self.assertEqual(generate_derivatives('products/phone.png'), 8)
+        for name, size in [('products/phone.jpg', (400, 200)), ('products/phone.png', (400, 400))]:
+            with default_storage.open(derivative_name(name, 400, 'webp')) as file:
+                self.assertEqual(Image.open(file).size, size)
+
+
+class ProductSearchTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.products = create_catalog(3)
+        for product, name in zip(cls.products, ['Galaxy S24', 'Galaxy A15', 'Fast Charger']):
+            product.name = name
+            product.save()
+        cls.products[2].description = 'Charges the Galaxy S24 in an hour'
+        cls.products[2].save()
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def search(self, query, param='q'):
+        response = self.client.get('/api/products/', {param: query})
+        return [row['slug'] for row in response.data['results']]
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize('<p>Galaxy S24 Ultra, 5G!</p> a'), ['galaxy', 's24', 'ultra', '5g'])
+
+    def test_every_term_must_match(self):
+        self.assertEqual(self.search('samsung galaxy a15'), ['galaxy-1'])
+        self.assertEqual(self.search('galaxy nokia'), [])
+
+    def test_name_match_ranks_above_description(self):
+        self.assertEqual(self.search('galaxy s24'), ['galaxy-0', 'galaxy-2'])
+
+    def test_last_term_matches_token_prefix(self):
+        self.assertEqual(self.search('gal', param='search')[2:], ['galaxy-2'])  # description match last
+        self.assertEqual(self.search('galaxy a1'), ['galaxy-1'])
+        self.assertEqual(self.search('c'), ['galaxy-2'])
+        self.assertEqual(self.search('!?'), [])
+
+    def test_q_takes_precedence_over_search(self):
+        response = self.client.get('/api/products/', {'q': 'a15', 'search': 'charger'})
+        self.assertEqual([row['slug'] for row in response.data['results']], ['galaxy-1'])
+
+    def test_reindexed_on_product_and_brand_save(self):
+        product = self.products[0]
+        product.name = 'Pixel 9'
+        product.save()
+        self.assertEqual(self.search('pixel'), ['galaxy-0'])
+        self.assertEqual(self.search('s24'), ['galaxy-2'])
+        brand = product.brand
+        brand.name = 'Google'
+        brand.save()
+        self.assertEqual(len(self.search('google')), 3)
+
+
+class SuggestTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.products = create_catalog(3)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_prefix_matches_any_word_without_queries(self):
+        self.client.get('/api/products/suggest/?prefix=x')  # builds the index
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/products/suggest/?prefix=SAMS')
+        self.assertEqual(response.data, [{'type': 'brand', 'name': 'Samsung', 'slug': 'samsung'}])
+        response = self.client.get('/api/products/suggest/?prefix=galaxy 1')
+        self.assertEqual([row['slug'] for row in response.data], ['galaxy-1'])
+
+    def test_incremental_updates(self):
+        self.client.get('/api/products/suggest/?prefix=x')
+        product = self.products[0]
+        product.name = 'Pixel 9'
+        with self.captureOnCommitCallbacks(execute=True):
+            product.save()
+            self.products[1].delete()
+        with self.assertNumQueries(0):
+            self.assertEqual([row['slug'] for row in self.client.get('/api/products/suggest/?prefix=pix').data], ['galaxy-0'])
+            self.assertEqual([row['slug'] for row in self.client.get('/api/products/suggest/?prefix=gal').data], ['galaxy-2'])
+
+    def test_out_of_band_change_triggers_rebuild(self):
+        self.client.get('/api/products/suggest/?prefix=x')
+        Product.objects.filter(pk=self.products[0].pk).update(name='Nokia G42')
+        bump_generation(Product)
+        response = self.client.get('/api/products/suggest/?prefix=nok')
+        self.assertEqual([row['slug'] for row in response.data], ['galaxy-0'])
+
+
+class HomeViewTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        create_catalog(3)
+        Product.objects.filter(slug='galaxy-0').update(product_type='msme')
+        cls.slide = HeroSlide.objects.create(
+            title='T', highlight='H', badge_text='B', description='D',
+            primary_button_text='P', primary_button_link='/', secondary_button_text='S',
+            secondary_button_link='/', image='hero_slides/h.jpg', card_label='L',
+            card_price='1', card_subtext='s',
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_sections_match_list_endpoints(self):
+        response = self.client.get('/api/home/')
+        self.assertEqual(len(response.data['hero_slides']), 1)
+        self.assertEqual(response.data['msme_products'], self.client.get('/api/products/?type=msme').data['results'])
+        self.assertEqual([row['slug'] for row in response.data['shop_products']], ['galaxy-2', 'galaxy-1'])
+        self.assertEqual(response.data['enterprise_bundles'], [])
+
+    def test_snapshot_is_shared_and_invalidated(self):
+        self.client.get('/api/home/')
+        with self.assertNumQueries(0):
+            self.client.get('/api/home/')
+        self.slide.title = 'New title'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.slide.save()
+        response = self.client.get('/api/home/')
+        self.assertEqual(response.data['hero_slides'][0]['title'], 'New title')
+
+
+class CartTotalsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.products = create_catalog(2)
+        cls.products[1].sale_price = Decimal('800')
+        cls.products[1].save()
+        cls.tablet = EducationTablet.objects.create(
+            name='Tab', slug='tab', brand='lenovo', size='11', description='Tablet',
+            image='education/tablets/t.jpg', price=Decimal('500'), stock=10,
+        )
+        cls.user = User.objects.create_user('shopper')
+        cart = Cart.objects.create(user=cls.user)
+        CartItem.objects.create(cart=cart, product=cls.products[0], variant=cls.products[0].variants.get(), quantity=2)
+        CartItem.objects.create(cart=cart, product=cls.products[1], quantity=1)
+        CartItem.objects.create(cart=cart, education_tablet=cls.tablet, quantity=3)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_totals_computed_in_sql(self):
+        # cart with totals + items with line prices
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/cart/')
+        self.assertEqual(response.data['total'], '4400.00')  # 2 * 1050 + 800 + 3 * 500
+        self.assertEqual(response.data['item_count'], 6)
+        self.assertEqual([item['total_price'] for item in response.data['items']], ['2100.00', '800.00', '1500.00'])
+
+    def test_model_properties_without_annotations(self):
+        cart = Cart.objects.get(user=self.user)
+        self.assertEqual((cart.total, cart.item_count), (Decimal('4400'), 6))
+        self.assertEqual(Cart.objects.with_totals().get(pk=Cart.objects.create().pk).total_amount, 0)
+
+    def test_order_uses_sql_prices(self):
+        response = self.client.post('/api/orders/', {
+            'full_name': 'Buyer', 'email': 'buyer@example.com', 'phone': '0700000000',
+            'town': 'Nairobi', 'address': 'Street',
+        })
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['data']['total'], '4400.00')
+        self.assertEqual(sorted(item['unit_price'] for item in response.data['data']['items']), ['1050.00', '500.00', '800.00'])
+
+
+class GuestCartTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.products = create_catalog(2)
+        cls.variant = cls.products[0].variants.get()
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def add(self, **data):
+        return self.client.post('/api/cart/', data, format='json')
+
+    def test_empty_get_writes_nothing(self):
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/cart/')
+        self.assertEqual((response.data['items'], response.data['total'], response.data['item_count']), ([], '0.00', 0))
+        self.assertNotIn('sessionid', response.cookies)
+        self.assertFalse(Cart.objects.exists())
+        self.assertFalse(Session.objects.exists())
+
+    def test_cart_lives_in_session(self):
+        self.add(product_id=self.products[0].id, variant_id=self.variant.id, quantity=2)
+        response = self.add(product_id=self.products[1].id)
+        self.assertEqual(response.status_code, 201)
+        self.add(product_id=self.products[1].id)
+        self.assertFalse(Cart.objects.exists())
+
+        response = self.client.get('/api/cart/')
+        self.assertEqual(response.data['total'], '4100.00')  # 2 * 1050 + 2 * 1000
+        self.assertEqual([item['quantity'] for item in response.data['items']], [2, 2])
+
+        line_id = response.data['items'][1]['id']
+        for quantity in (2.5, -1, 'many'):
+            response = self.client.patch(f'/api/cart/items/{line_id}/', {'quantity': quantity}, format='json')
+            self.assertEqual(response.status_code, 400)
+        response = self.client.patch(f'/api/cart/items/{line_id}/', {'quantity': 5}, format='json')
+        self.assertEqual(response.data['item_count'], 7)
+        response = self.client.delete(f'/api/cart/items/{line_id}/')
+        self.assertEqual(response.data['item_count'], 2)
+        self.assertEqual(self.client.delete('/api/cart/items/99/').status_code, 404)
+
+    def test_checkout_materializes_cart(self):
+        self.add(product_id=self.products[0].id, quantity=3)
+        response = self.client.post('/api/orders/', {
+            'full_name': 'Buyer', 'email': 'buyer@example.com', 'phone': '0700000000',
+            'town': 'Nairobi', 'address': 'Street',
+        })
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['data']['total'], '3000.00')
+        self.assertFalse(Cart.objects.exists())
+        self.assertEqual(self.client.get('/api/cart/').data['items'], [])
+
+    def test_login_merges_into_user_cart(self):
+        user = User.objects.create_user('shopper', password='secret-pass-1')
+        cart = Cart.objects.create(user=user)
+        CartItem.objects.create(cart=cart, product=self.products[0], quantity=1)
+        self.add(product_id=self.products[0].id, quantity=2)
+        self.add(product_id=self.products[1].id)
+
+        response = self.client.post('/api/auth/login/', {'username': 'shopper', 'password': 'secret-pass-1'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            sorted(cart.items.values_list('product__slug', 'quantity')), [('galaxy-0', 3), ('galaxy-1', 1)]
+        )
+        self.assertEqual(Cart.objects.count(), 1)
+
+
+class CartBulkTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.products = create_catalog(4)
+        cls.user = User.objects.create_user('shopper')
+        cls.cart = Cart.objects.create(user=cls.user)
+        cls.items = [CartItem.objects.create(cart=cls.cart, product=product) for product in cls.products[:3]]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def bulk(self, *operations):
+        return self.client.post('/api/cart/bulk/', {'operations': list(operations)}, format='json')
+
+    def test_operations_applied_together(self):
+        # cart + its lines + product check + delete + update + insert + re-read (cart, items), plus a savepoint pair
+        with self.assertNumQueries(10):
+            response = self.bulk(
+                {'op': 'set', 'item_id': self.items[0].id, 'quantity': 4},
+                {'op': 'remove', 'item_id': self.items[1].id},
+                {'op': 'add', 'product_id': self.products[2].id, 'quantity': 2},
+                {'op': 'add', 'product_id': self.products[3].id},
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(item['product']['slug'], item['quantity']) for item in response.data['items']],
+            [('galaxy-0', 4), ('galaxy-2', 3), ('galaxy-3', 1)],
+        )
+        self.assertEqual(response.data['item_count'], 8)
+
+    def test_invalid_batch_changes_nothing(self):
+        response = self.bulk(
+            {'op': 'set', 'item_id': self.items[0].id, 'quantity': 4},
+            {'op': 'remove', 'item_id': self.items[1].id},
+            {'op': 'set', 'item_id': self.items[1].id, 'quantity': 2},
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.bulk({'op': 'add', 'product_id': 999}).status_code, 400)
+        self.assertEqual(sorted(self.cart.items.values_list('quantity', flat=True)), [1, 1, 1])
+
+    def test_guest_cart(self):
+        client = APIClient()
+        client.post('/api/cart/', {'product_id': self.products[0].id}, format='json')
+        line_id = client.get('/api/cart/').data['items'][0]['id']
+        response = client.post('/api/cart/bulk/', {'operations': [
+            {'op': 'set', 'item_id': line_id, 'quantity': 3},
+            {'op': 'add', 'product_id': self.products[1].id, 'variant_id': self.products[1].variants.get().id},
+        ]}, format='json')
+        self.assertEqual(response.data['item_count'], 4)
+        self.assertEqual(response.data['total'], '4050.00')
+
+
+@skipUnless(connection.vendor != 'sqlite' or django.VERSION >= (5, 1), 'needs IMMEDIATE sqlite transactions')
+class CartConcurrencyTests(TransactionTestCase):
+    """Many requests adding to one cart at once: no lost increments, no duplicate lines"""
+
+    THREADS = 8
+    ADDS_PER_THREAD = 10
+
+    def setUp(self):
+        self.products = create_catalog(2)
+        self.variant = self.products[1].variants.get()
+        self.cart = Cart.objects.create()
+
+    def hammer(self, add):
+        errors = []
+        barrier = threading.Barrier(self.THREADS)
+
+        def worker():
+            try:
+                barrier.wait()
+                for _ in range(self.ADDS_PER_THREAD):
+                    add()
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+    def test_parallel_adds(self):
+        self.hammer(lambda: CartItem.objects.add(self.cart, product_id=self.products[0].id))
+        self.hammer(lambda: CartItem.objects.add(
+            self.cart, product_id=self.products[1].id, variant_id=self.variant.id, quantity=2
+        ))
+        self.assertEqual(
+            sorted(self.cart.items.values_list('line_key', 'quantity')),
+            [(f'p{self.products[0].id}', 80), (f'p{self.products[1].id}-v{self.variant.id}', 160)],
+        )
+
+    def test_duplicate_line_rejected(self):
+        CartItem.objects.create(cart=self.cart, product=self.products[0])
+        with self.assertRaises(IntegrityError):
+            CartItem.objects.create(cart=self.cart, product=self.products[0], quantity=2)
+
+
+class PurgeStaleCartsTests(TestCase):
+
+    def test_deletes_only_stale_guest_data(self):
+        product = create_catalog(1)[0]
+        user = User.objects.create_user('shopper')
+        old = timezone.now() - timedelta(days=3)
+        stale = [Cart.objects.create(session_key=f'old-{i}') for i in range(5)]
+        for cart in stale:
+            CartItem.objects.create(cart=cart, product=product)
+        Cart.objects.filter(pk__in=[cart.pk for cart in stale]).update(updated_at=old)
+        fresh = Cart.objects.create(session_key='fresh')
+        user_cart = Cart.objects.create(user=user)
+        Cart.objects.filter(pk=user_cart.pk).update(updated_at=old)
+        Session.objects.bulk_create([
+            Session(session_key=f'expired-{i}', session_data='', expire_date=old) for i in range(5)
+        ] + [Session(session_key='live', session_data='', expire_date=timezone.now() + timedelta(days=1))])
+        IdempotencyKey.objects.create(owner='anonymous', key='old', fingerprint='', expires_at=old)
+
+        out = StringIO()
+        call_command('purge_stale_carts', batch_size=2, pause=0, stdout=out)
+        self.assertIn('Deleted 5 guest carts (5 items)', out.getvalue())
+        self.assertIn('Deleted 5 expired sessions', out.getvalue())
+        self.assertIn('Deleted 1 expired idempotency keys', out.getvalue())
+        self.assertEqual(set(Cart.objects.values_list('pk', flat=True)), {fresh.pk, user_cart.pk})
+        self.assertFalse(CartItem.objects.exists())
+        self.assertEqual(list(Session.objects.values_list('session_key', flat=True)), ['live'])
+
+
+ORDER_DATA = {
+    'full_name': 'Buyer', 'email': 'buyer@example.com', 'phone': '0700000000', 'town': 'Nairobi', 'address': 'Street',
+}
+
+
+class StockReservationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.product = create_catalog(1)[0]
+        cls.users = [User.objects.create_user(f'shopper{i}') for i in range(2)]
+        for user in cls.users:
+            CartItem.objects.create(cart=Cart.objects.create(user=user), product=cls.product, quantity=3)
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def stock(self):
+        return Product.objects.get(pk=self.product.pk).stock
+
+    def test_hold_then_order(self):
+        first, second = (self.client_for(user) for user in self.users)
+        self.assertEqual(first.post('/api/orders/reserve/').status_code, 200)
+        self.assertEqual(self.stock(), 2)
+        # Holding again replaces the previous hold instead of adding to it
+        first.post('/api/orders/reserve/')
+        self.assertEqual((self.stock(), StockReservation.objects.count()), (2, 1))
+
+        response = second.post('/api/orders/', ORDER_DATA)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['error']['code'], 'OUT_OF_STOCK')
+        self.assertEqual(second.post('/api/orders/reserve/').status_code, 409)
+
+        self.assertEqual(first.post('/api/orders/', ORDER_DATA).status_code, 201)
+        self.assertEqual((self.stock(), StockReservation.objects.count()), (2, 0))
+
+    def test_unused_hold_given_back(self):
+        client = self.client_for(self.users[0])
+        client.post('/api/orders/reserve/')
+        CartItem.objects.filter(cart__user=self.users[0]).update(quantity=1)
+        self.assertEqual(client.post('/api/orders/', ORDER_DATA).status_code, 201)
+        self.assertEqual(self.stock(), 4)
+
+    def test_expired_holds_released(self):
+        self.client_for(self.users[0]).post('/api/orders/reserve/')
+        StockReservation.objects.update(expires_at=timezone.now() - timedelta(minutes=1))
+        out = StringIO()
+        call_command('release_stock_holds', stdout=out)
+        self.assertIn('Released 1 expired holds', out.getvalue())
+        self.assertEqual((self.stock(), StockReservation.objects.count()), (5, 0))
+
+    def test_guest_without_session_gets_own_holder(self):
+        holders = set()
+        for _ in range(2):
+            request = APIRequestFactory().post('/api/orders/reserve/')
+            request.user, request.session = AnonymousUser(), SessionStore()
+            holders.add(holder_for(request))
+        self.assertEqual(len(holders), 2)
+        self.assertNotIn('session:None', holders)
+
+    def test_sell_out_invalidates_cached_list(self):
+        cache.clear()
+        self.assertTrue(APIClient().get('/api/products/').data['results'][0]['in_stock'])
+        CartItem.objects.filter(cart__user=self.users[0]).update(quantity=5)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.client_for(self.users[0]).post('/api/orders/', ORDER_DATA).status_code, 201)
+        self.assertFalse(APIClient().get('/api/products/').data['results'][0]['in_stock'])
+
+
+@skipUnless(connection.vendor != 'sqlite' or django.VERSION >= (5, 1), 'needs IMMEDIATE sqlite transactions')
+class FlashSaleTests(TransactionTestCase):
+    """More buyers than stock check out at the same moment: exactly the stock is sold"""
+
+    BUYERS = 12
+
+    def test_no_oversell(self):
+        product = create_catalog(1)[0]  # stock 5
+        users = [User.objects.create_user(f'buyer{i}') for i in range(self.BUYERS)]
+        for user in users:
+            CartItem.objects.create(cart=Cart.objects.create(user=user), product=product)
+
+        statuses, errors = [], []
+        barrier = threading.Barrier(self.BUYERS)
+
+        def buy(user, reserve_first):
+            client = APIClient()
+            client.force_authenticate(user)
+            try:
+                barrier.wait()
+                if reserve_first:
+                    client.post('/api/orders/reserve/')
+                statuses.append(client.post('/api/orders/', ORDER_DATA).status_code)
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=buy, args=(user, i % 2 == 0)) for i, user in enumerate(users)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(sorted(statuses), [201] * 5 + [409] * (self.BUYERS - 5))
+        self.assertEqual(Product.objects.get(pk=product.pk).stock, 0)
+        self.assertEqual(OrderItem.objects.count(), 5)
+        self.assertFalse(StockReservation.objects.exists())
+
+
+class IdempotencyKeyTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.product = create_catalog(1)[0]
+        cls.user = User.objects.create_user('shopper')
+        cls.cart = Cart.objects.create(user=cls.user)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def order(self, key, data=ORDER_DATA):
+        return self.client.post('/api/orders/', data, format='json', HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_retried_order_is_replayed(self):
+        CartItem.objects.create(cart=self.cart, product=self.product)
+        first = self.order('checkout-1')
+        self.assertEqual(first.status_code, 201)
+
+        with CaptureQueriesContext(connection) as queries:
+            retry = self.order('checkout-1')
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(retry.data['data']['order_id'], first.data['data']['order_id'])
+        # Only the failed claim and the stored response: the view did not run
+        sql = [query['sql'] for query in queries.captured_queries if 'SAVEPOINT' not in query['sql']]
+        self.assertTrue(all('store_idempotencykey' in statement for statement in sql))
+        self.assertEqual(Order.objects.count(), 1)
+
+        self.assertEqual(self.order('checkout-1', {**ORDER_DATA, 'town': 'Mombasa'}).status_code, 422)
+
+    def test_failed_request_releases_key(self):
+        self.assertEqual(self.order('checkout-1').status_code, 400)  # empty cart
+        CartItem.objects.create(cart=self.cart, product=self.product)
+        self.assertEqual(self.order('checkout-1').status_code, 201)
+
+    def test_request_in_progress(self):
+        CartItem.objects.create(cart=self.cart, product=self.product)
+        self.order('checkout-1')
+        IdempotencyKey.objects.update(status_code=None)
+        self.assertEqual(self.order('checkout-1').status_code, 409)
+        IdempotencyKey.objects.update(expires_at=timezone.now())  # the worker died
+        self.assertEqual(self.order('checkout-1').status_code, 400)  # runs again: the cart is empty now
+
+    def test_sessionless_guest_key_rejected(self):
+        response = APIClient().post('/api/orders/', ORDER_DATA, format='json', HTTP_IDEMPOTENCY_KEY='checkout-1')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+    def test_retried_donation_counts_once(self):
+        fundraiser = Fundraiser.objects.create(
+            creator=self.user, fundraiser_type='single_board', school_name='School', school_location='Nairobi',
+            target_amount=Decimal('1000'), share_link='school',
+        )
+        donation = {'donor_name': 'Alumnus', 'amount': '100.00', 'payment_method': 'mpesa'}
+        for _ in range(2):
+            response = self.client.post(
+                '/api/education/fundraisers/school/donate/', donation, format='json', HTTP_IDEMPOTENCY_KEY='gift-1'
+            )
+            self.assertEqual(response.status_code, 201)
+        fundraiser.refresh_from_db()
+        self.assertEqual(fundraiser.current_amount, Decimal('100'))
+        self.assertEqual(fundraiser.donations.count(), 1)
+
+
+class OrderQueryCountTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        products = create_catalog()
+        tablet = EducationTablet.objects.create(
+            name='Tab', slug='tab', brand='lenovo', size='11', description='Tablet',
+            image='education/tablets/t.jpg', price=Decimal('500'), stock=10,
+        )
+        cls.user = User.objects.create_user('buyer')
+        for _ in range(3):
+            order = Order.objects.create(
+                user=cls.user, full_name='Buyer', email='buyer@example.com', phone='0700000000',
+                town='Nairobi', address='Street', subtotal=Decimal('0'), total=Decimal('0'),
+            )
+            for product in products:
+                OrderItem.objects.create(
+                    order=order, product=product, variant=product.variants.first(),
+                    quantity=2, unit_price=Decimal('1050'),
+                )
+            OrderItem.objects.create(order=order, education_tablet=tablet, quantity=1, unit_price=Decimal('500'))
+        cls.order = order
+        cls.products = products
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_list(self):
+        # COUNT + orders + items (only product and tablet name/image joined)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/orders/')
+        self.assertEqual(len(queries), 3)
+        self.assertNotIn('store_category', queries[2]['sql'])
+        self.assertNotIn('store_productvariant', queries[2]['sql'])
+        summary = response.data['results'][0]
+        self.assertNotIn('items', summary)
+        self.assertEqual(summary['item_count'], 6)
+        self.assertEqual(summary['town'], 'Nairobi')
+        self.assertEqual(len(summary['thumbnails']), 4)
+        self.assertEqual(summary['thumbnails'][0]['name'], 'Galaxy 0')
+        self.assertEqual(summary['thumbnails'][0]['image'], 'http://testserver/media/products/p.jpg')
+
+    def test_list_expand_items(self):
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/orders/?expand=items')
+        self.assertEqual(len(response.data['results']), 3)
+        self.assertEqual(len(response.data['results'][0]['items']), 6)
+
+    def test_retrieve(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(f'/api/orders/{self.order.order_id}/')
+        item = response.data['items'][0]
+        self.assertEqual(item['variant']['final_price'], '1050.00')
+        self.assertEqual(item['product']['brand']['slug'], 'samsung')
+
+    def checkout(self, products):
+        cart, _ = Cart.objects.get_or_create(user=self.user)
+        for product in products:
+            CartItem.objects.create(cart=cart, product=product, quantity=2)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/api/orders/', {
+                'full_name': 'Buyer', 'email': 'buyer@example.com', 'phone': '0700000000',
+                'town': 'Nairobi', 'address': 'Street',
+            })
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['data']['total'], f'{2000 * len(products)}.00')
+        self.assertEqual(len(response.data['data']['items']), len(products))
+        self.assertFalse(cart.items.exists())
+        return len(queries)
+
+    def test_create(self):
+        # cart (locked) + priced lines + holds + stock update + order + bulk items + clear,
+        # savepoints, re-read (order, items)
+        self.assertEqual(self.checkout(self.products[:1]), 13)
+        self.assertEqual(self.checkout(self.products), 13)
+        self.assertEqual(Product.objects.get(pk=self.products[0].pk).stock, 1)
+
+
+class CatalogResponseCacheTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.products = create_catalog(2)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_anonymous_repeat_is_served_from_cache(self):
+        first = self.client.get('/api/products/?type=shop')
+        with self.assertNumQueries(0):
+            second = self.client.get('/api/products/?type=shop')
+        self.assertEqual(first.data, second.data)
+
+    def test_write_invalidates(self):
+        self.client.get('/api/products/galaxy-0/')
+        product = self.products[0]
+        product.name = 'Galaxy Renamed'
+        with self.captureOnCommitCallbacks(execute=True):
+            product.save()
+        response = self.client.get('/api/products/galaxy-0/')
+        self.assertEqual(response.data['name'], 'Galaxy Renamed')
+
+    def test_variant_write_invalidates(self):
+        self.client.get('/api/products/galaxy-0/')
+        with self.captureOnCommitCallbacks(execute=True):
+            ProductVariant.objects.create(product=self.products[0], name='256GB', sku='sku-new')
+        response = self.client.get('/api/products/galaxy-0/')
+        self.assertEqual(len(response.data['variants']), 2)
+
+    def test_authenticated_requests_bypass_cache(self):
+        self.client.force_authenticate(User.objects.create_user('shopper'))
+        self.client.get('/api/brands/')
+        with self.assertNumQueries(2):
+            self.client.get('/api/brands/')
+
+
+class ConditionalGetTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.products = create_catalog(2)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_matching_etag_returns_304_without_queries(self):
+        response = self.client.get('/api/products/galaxy-0/')
+        etag = response['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/products/galaxy-0/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_nested_change_updates_etag(self):
+        etag = self.client.get('/api/products/galaxy-0/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            ProductImage.objects.create(product=self.products[0], image='products/new.jpg')
+        response = self.client.get('/api/products/galaxy-0/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_last_modified_on_uncached_list(self):
+        HeroSlide.objects.create(
+            title='T', highlight='H', badge_text='B', description='D',
+            primary_button_text='P', primary_button_link='/', secondary_button_text='S',
+            secondary_button_link='/', image='hero_slides/h.jpg', card_label='L',
+            card_price='1', card_subtext='s',
+        )
+        response = self.client.get('/api/hero-slides/')
+        self.assertIn('Last-Modified', response)
+        response = self.client.get('/api/hero-slides/', HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
@@ -7,8 +7,8 @@ from .views import (
     EducationBoardViewSet, ClassroomPackageViewSet, DonationAmountListView,
     FundraiserViewSet, EducationTabletViewSet, TabletSoftwareListView,
     SchoolTabletOrderViewSet,
-    CartView, CartItemView, OrderViewSet,
-    HeroSlideListView, TradeInRequestView, EmployerListView, BankListView, SchoolListView, PolicyDetailView
+    CartView, CartItemView, CartBulkView, OrderViewSet,
+    HomeView, HeroSlideListView, TradeInRequestView, EmployerListView, BankListView, SchoolListView, PolicyDetailView
 )
 
 router = DefaultRouter()
@@ -36,6 +36,9 @@ router.register(r'orders', OrderViewSet, basename='order')
 urlpatterns = [
     path('', include(router.urls)),
     
+    # Homepage bootstrap (hero slides, featured products, enterprise bundles)
+    path('home/', HomeView.as_view(), name='home'),
+    
     # Hero Slides
     path('hero-slides/', HeroSlideListView.as_view(), name='hero-slides'),
     
@@ -58,6 +61,7 @@ urlpatterns = [
     # Cart
     path('cart/', CartView.as_view(), name='cart'),
     path('cart/items/<int:item_id>/', CartItemView.as_view(), name='cart-item'),
+    path('cart/bulk/', CartBulkView.as_view(), name='cart-bulk'),
     
     # Trade-In
     path('trade-in-requests/', TradeInRequestView.as_view(), name='trade-in-requests'),
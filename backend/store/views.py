@@ -5,8 +5,11 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAuthenticated, AllowAny, BasePermission
 from rest_framework.authentication import TokenAuthentication, SessionAuthentication
 from rest_framework.views import APIView
-from django.db.models import Sum
+from django.db import transaction
+from django.db.models import Prefetch, Sum
+from django.core.cache import cache
 from django.shortcuts import get_object_or_404
+from django.http import Http404
 from django.core.mail import send_mail
 from django.conf import settings
 from django.views.decorators.csrf import csrf_exempt
@@ -16,7 +19,7 @@ from .models import (
     EnterpriseBundle, EnterpriseOrder,
     EducationBoard, ClassroomPackage, Fundraiser, DonationAmount, Donation,
     EducationTablet, TabletSoftware, SchoolTabletOrder, SchoolTabletOrderItem,
-    Cart, CartItem, Order, OrderItem, ProductVariant, HeroSlide, TradeInRequest, Employer, Bank, School, Policy
+    Cart, CartItem, Order, OrderItem, ProductVariant, ProductImage, HeroSlide, TradeInRequest, Employer, Bank, School, Policy
 )
 from .serializers import (
     CategorySerializer, BrandSerializer,
@@ -26,11 +29,22 @@ from .serializers import (
     EducationBoardSerializer, ClassroomPackageSerializer, DonationAmountSerializer,
     FundraiserListSerializer, FundraiserDetailSerializer, FundraiserCreateSerializer, DonationSerializer,
     EducationTabletSerializer, TabletSoftwareSerializer, SchoolTabletOrderSerializer,
-    CartSerializer, CartItemSerializer, CartItemCreateSerializer,
-    OrderSerializer, OrderCreateSerializer, HeroSlideSerializer,
+    CartSerializer, CartItemSerializer, CartItemCreateSerializer, CartItemUpdateSerializer,
+    GuestCartSerializer, CartBulkSerializer,
+    OrderSerializer, OrderSummarySerializer, OrderCreateSerializer, HeroSlideSerializer,
     TradeInRequestSerializer, TradeInRequestCreateSerializer, EmployerSerializer, BankSerializer, SchoolSerializer, PolicySerializer
 )
 from .utils import SensitiveOperationThrottle, InputValidator, get_client_ip
+from .search import ProductSearchFilter
+from .attributes import AttributeFilter
+from .carts import GuestCart, apply_operations
+from .idempotency import idempotent
+from .facets import compute_facets
+from .cache import CachedResponseMixin, ConditionalGetMixin, make_cache_key
+from .pagination import PageOrCursorPagination, ReviewPagination
+from .projections import ProductListProjectionSerializer, product_list_values
+from .querysets import plan_queryset
+from . import inventory, suggest
 
 logger = logging.getLogger(__name__)
 security_logger = logging.getLogger('django.security')
@@ -65,7 +79,7 @@ class IsOwnerOrAdmin(BasePermission):
 
 # ============ POLICY VIEW ============
 
-class PolicyDetailView(generics.RetrieveAPIView):
+class PolicyDetailView(ConditionalGetMixin, generics.RetrieveAPIView):
     """Get a specific policy by type (privacy, terms, cookies, etc.)"""
     serializer_class = PolicySerializer
     permission_classes = [AllowAny]
@@ -77,16 +91,56 @@ class PolicyDetailView(generics.RetrieveAPIView):
 
 # ============ HERO SLIDES VIEW ============
 
-class HeroSlideListView(generics.ListAPIView):
+class HeroSlideListView(ConditionalGetMixin, generics.ListAPIView):
     """Get all active hero slides for homepage"""
     queryset = HeroSlide.objects.filter(is_active=True)
     serializer_class = HeroSlideSerializer
     permission_classes = [AllowAny]
 
 
+# ============ HOMEPAGE VIEW ============
+
+class HomeView(APIView):
+    """
+    Homepage bootstrap: hero slides, shop and MSME products and enterprise
+    bundles in one response. The payload is the same for every visitor, so
+    it is built once per host and cached until one of `cache_models` changes.
+    """
+    permission_classes = [AllowAny]
+    authentication_classes = []  # Anonymous snapshot, no need to resolve the user
+    cache_models = [HeroSlide, Product, Review, Brand, Category, EnterpriseBundle]
+    cache_timeout = 60 * 60 * 24
+    PRODUCTS_PER_SECTION = 4
+
+    def get(self, request):
+        # Host is part of the key because serialized image URLs are absolute
+        cache_key = make_cache_key(f'home:{request.get_host()}', self.cache_models)
+        data = cache.get(cache_key)
+        if data is None:
+            data = self.build_snapshot(request)
+            cache.set(cache_key, data, self.cache_timeout)
+        return Response(data)
+
+    def build_snapshot(self, request):
+        context = {'request': request}
+        products = plan_queryset(Product.objects.filter(is_active=True), ProductListSerializer).order_by('-created_at')
+
+        def product_section(product_type):
+            rows = product_list_values(products.filter(product_type=product_type))[:self.PRODUCTS_PER_SECTION]
+            return ProductListProjectionSerializer(rows, context=context).data
+
+        bundles = plan_queryset(EnterpriseBundle.objects.filter(is_active=True), EnterpriseBundleSerializer)
+        return {
+            'hero_slides': HeroSlideSerializer(HeroSlide.objects.filter(is_active=True), many=True, context=context).data,
+            'shop_products': product_section('shop'),
+            'msme_products': product_section('msme'),
+            'enterprise_bundles': EnterpriseBundleSerializer(bundles, many=True, context=context).data,
+        }
+
+
 # ============ EMPLOYER VIEW ============
 
-class EmployerListView(generics.ListAPIView):
+class EmployerListView(ConditionalGetMixin, generics.ListAPIView):
     """Get all active employers for salaried employee dropdown"""
     queryset = Employer.objects.filter(is_active=True).order_by('name')
     serializer_class = EmployerSerializer
@@ -96,7 +150,7 @@ class EmployerListView(generics.ListAPIView):
 
 # ============ BANK VIEW ============
 
-class BankListView(generics.ListAPIView):
+class BankListView(ConditionalGetMixin, generics.ListAPIView):
     """Get all active banks for financing dropdown"""
     queryset = Bank.objects.filter(is_active=True).order_by('name')
     serializer_class = BankSerializer
@@ -122,10 +176,12 @@ class SchoolListView(generics.ListAPIView):
 
 # ============ BASE VIEWS ============
 
-class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
+class CategoryViewSet(ConditionalGetMixin, CachedResponseMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     lookup_field = 'slug'
+    cache_models = [Category]
+    last_modified_field = None
     
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -135,31 +191,73 @@ class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
         return queryset
 
 
-class BrandViewSet(viewsets.ReadOnlyModelViewSet):
+class BrandViewSet(ConditionalGetMixin, CachedResponseMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Brand.objects.all()
     serializer_class = BrandSerializer
     lookup_field = 'slug'
+    cache_models = [Brand]
+    last_modified_field = None
+
 
+class ProductOrderingFilter(filters.OrderingFilter):
+    """?ordering=price sorts by the stored effective price, i.e. what the customer pays"""
+    field_aliases = {'price': 'effective_price'}
 
-class ProductViewSet(viewsets.ReadOnlyModelViewSet):
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if not ordering:
+            return ordering
+        return [
+            ('-' if field.startswith('-') else '') + self.field_aliases.get(field.lstrip('-'), field.lstrip('-'))
+            for field in ordering
+        ]
+
+
+class ProductViewSet(ConditionalGetMixin, CachedResponseMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Product.objects.filter(is_active=True)
     lookup_field = 'slug'
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ['name', 'description', 'brand__name']
+    cache_models = [Product, ProductVariant, ProductImage, Review, Brand, Category]
+    pagination_class = PageOrCursorPagination
+    # Search (?q= / ?search=) uses the ranked token index in store.search
+    # Attribute filters (?ram_gb__gte=8&storage_gb=256) use the parsed table in store.attributes
+    filter_backends = [AttributeFilter, ProductOrderingFilter, ProductSearchFilter]
     ordering_fields = ['price', 'created_at', 'name']
     ordering = ['-created_at']
+    FACETS_CACHE_TIMEOUT = 60 * 15
+    FACETS_IGNORED_PARAMS = {'page', 'page_size', 'ordering'}
+    BATCH_LIMIT = 200
+    # List pages are rendered from a flat .values() projection (store.projections);
+    # the JSON is identical to ProductListSerializer's
+    fast_list = True
 
     def get_serializer_class(self):
         if self.action == 'retrieve':
             return ProductDetailSerializer
         return ProductListSerializer
 
+    def use_fast_list(self):
+        return self.fast_list and self.action == 'list'
+
+    def get_serializer(self, *args, **kwargs):
+        if self.use_fast_list() and kwargs.get('many'):
+            kwargs.pop('many')
+            kwargs.setdefault('context', self.get_serializer_context())
+            return ProductListProjectionSerializer(*args, **kwargs)
+        return super().get_serializer(*args, **kwargs)
+
+    def paginate_queryset(self, queryset):
+        if self.use_fast_list():
+            queryset = product_list_values(queryset)
+        return super().paginate_queryset(queryset)
+
     def get_queryset(self):
         queryset = super().get_queryset()
         
-        # OPTIMIZATION: Use select_related for foreign keys and prefetch_related for many-to-many/reverse relations
-        # This reduces database queries from N+1 to just 2-3 queries
-        queryset = queryset.select_related('brand', 'category').prefetch_related('variants', 'images', 'reviews')
+        # OPTIMIZATION: joins, prefetches and columns are derived from the serializer this
+        # action uses, so list pages don't pay for variants/images only detail renders
+        queryset = plan_queryset(
+            queryset, self.get_serializer_class(), extra_fields=[*self.ordering_fields, 'effective_price']
+        )
         
         category = self.request.query_params.get('category')
         product_type = self.request.query_params.get('type')
@@ -180,12 +278,75 @@ class ProductViewSet(viewsets.ReadOnlyModelViewSet):
         if unique_variant:
             queryset = queryset.filter(is_unique_variant=True)
         if min_price:
-            queryset = queryset.filter(price__gte=min_price)
+            queryset = queryset.filter(effective_price__gte=min_price)
         if max_price:
-            queryset = queryset.filter(price__lte=max_price)
+            queryset = queryset.filter(effective_price__lte=max_price)
 
         return queryset
 
+    @action(detail=False, methods=['get'])
+    def facets(self, request):
+        """Product counts per category, brand, type and price bucket for the current filters"""
+        params = [
+            (key, value) for key, value in request.query_params.items()
+            if key not in self.FACETS_IGNORED_PARAMS
+        ]
+        cache_key = make_cache_key('facets', [Product, ProductVariant, Brand, Category], params)
+        data = cache.get(cache_key)
+        if data is None:
+            data = compute_facets(self.filter_queryset(self.get_queryset()))
+            cache.set(cache_key, data, self.FACETS_CACHE_TIMEOUT)
+        return Response(data)
+
+    @action(detail=False, methods=['get'])
+    def batch(self, request):
+        """
+        Product cards for a known set of products (?ids=1,2,3 or ?slugs=a,b) in one
+        query, in the requested order; unknown or inactive products are skipped
+        """
+        ids = [value for value in request.query_params.get('ids', '').split(',') if value.strip()]
+        slugs = [value.strip() for value in request.query_params.get('slugs', '').split(',') if value.strip()]
+        if ids and slugs:
+            return Response({'error': 'Pass either ids or slugs, not both'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            keys = [int(value) for value in ids] if ids else slugs
+        except ValueError:
+            return Response({'error': 'ids must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+        keys = list(dict.fromkeys(keys))
+        if len(keys) > self.BATCH_LIMIT:
+            return Response(
+                {'error': f'At most {self.BATCH_LIMIT} products per request'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        def build_response():
+            key_field = 'id' if ids else 'slug'
+            rows = product_list_values(self.get_queryset().filter(**{f'{key_field}__in': keys}))
+            by_key = {row[key_field]: row for row in rows}
+            page = [by_key[key] for key in keys if key in by_key]
+            return Response(ProductListProjectionSerializer(page, context=self.get_serializer_context()).data)
+        return self.cached_response(request, build_response)
+
+    @action(detail=False, methods=['get'])
+    def suggest(self, request):
+        """Typeahead: products and brands with a name word starting with ?prefix=, from memory"""
+        try:
+            limit = min(int(request.query_params.get('limit', suggest.DEFAULT_LIMIT)), suggest.MAX_LIMIT)
+        except ValueError:
+            limit = suggest.DEFAULT_LIMIT
+        return Response(suggest.suggest_index.suggest(request.query_params.get('prefix', ''), limit))
+
+    @action(detail=True, methods=['get'])
+    def reviews(self, request, slug=None):
+        """Cursor-paginated reviews of a product, newest first"""
+        product = get_object_or_404(Product.objects.filter(is_active=True).only('id'), slug=slug)
+        reviews = Review.objects.filter(product=product).select_related('user').only(
+            'id', 'rating', 'comment', 'created_at', 'user__username'
+        )
+        paginator = ReviewPagination()
+        page = paginator.paginate_queryset(reviews, request, view=self)
+        return paginator.get_paginated_response(ReviewSerializer(page, many=True).data)
+
     @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
     def review(self, request, slug=None):
         product = self.get_object()
@@ -197,7 +358,9 @@ class ProductViewSet(viewsets.ReadOnlyModelViewSet):
                     {'error': 'You have already reviewed this product'},
                     status=status.HTTP_400_BAD_REQUEST
                 )
-            serializer.save(product=product, user=request.user)
+            # The review and the product's rating summary (store.signals) commit together
+            with transaction.atomic():
+                serializer.save(product=product, user=request.user)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -245,6 +408,10 @@ class FinancingApplicationViewSet(viewsets.ModelViewSet):
             return [IsOwnerOrAdmin()]
         return super().get_permissions()
     
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
+    
     def perform_create(self, serializer):
         user = self.request.user
         security_logger.info(
@@ -312,11 +479,13 @@ class FinancingApplicationViewSet(viewsets.ModelViewSet):
 
 # ============ ENTERPRISE VIEWS ============
 
-class EnterpriseBundleViewSet(viewsets.ReadOnlyModelViewSet):
+class EnterpriseBundleViewSet(ConditionalGetMixin, CachedResponseMixin, viewsets.ReadOnlyModelViewSet):
     """List enterprise bundles (DAAS)"""
     queryset = EnterpriseBundle.objects.filter(is_active=True)
     serializer_class = EnterpriseBundleSerializer
     permission_classes = [AllowAny]
+    cache_models = [EnterpriseBundle, Product, Brand, Category]
+    last_modified_field = None
 
 
 class EnterpriseOrderViewSet(viewsets.ModelViewSet):
@@ -419,6 +588,7 @@ class FundraiserViewSet(viewsets.ModelViewSet):
     """Handle fundraisers"""
     queryset = Fundraiser.objects.all()
     lookup_field = 'share_link'
+    pagination_class = PageOrCursorPagination
     
     def get_serializer_class(self):
         if self.action == 'create':
@@ -445,6 +615,7 @@ class FundraiserViewSet(viewsets.ModelViewSet):
         return queryset
     
     @action(detail=True, methods=['post'], permission_classes=[AllowAny])
+    @idempotent
     def donate(self, request, share_link=None):
         """Process a donation"""
         fundraiser = self.get_object()
@@ -468,11 +639,13 @@ class FundraiserViewSet(viewsets.ModelViewSet):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class EducationTabletViewSet(viewsets.ReadOnlyModelViewSet):
+class EducationTabletViewSet(ConditionalGetMixin, CachedResponseMixin, viewsets.ReadOnlyModelViewSet):
     """List education tablets"""
     queryset = EducationTablet.objects.filter(is_active=True)
     serializer_class = EducationTabletSerializer
     lookup_field = 'slug'
+    cache_models = [EducationTablet]
+    last_modified_field = None
     
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -507,6 +680,21 @@ class SchoolTabletOrderViewSet(viewsets.ModelViewSet):
 
 # ============ CART VIEWS ============
 
+def cart_queryset():
+    """Carts with totals and item prices computed in SQL, ready for CartSerializer"""
+    items = CartItem.objects.with_prices().select_related(
+        'product__brand', 'product__category', 'variant', 'education_tablet'
+    ).order_by('pk')
+    return Cart.objects.with_totals().prefetch_related(Prefetch('items', queryset=items))
+
+
+def serialize_cart(cart):
+    """Re-read a cart after changes (fresh totals and items) and serialize it"""
+    if isinstance(cart, GuestCart):
+        return GuestCartSerializer(cart).data
+    return CartSerializer(cart_queryset().get(pk=cart.pk)).data
+
+
 @method_decorator(csrf_exempt, name='dispatch')
 class CartView(APIView):
     """Handle shopping cart"""
@@ -515,27 +703,15 @@ class CartView(APIView):
     
     def get_cart(self, request):
         if request.user.is_authenticated:
-            cart, _ = Cart.objects.select_related('user').prefetch_related(
-                'items__product__brand',
-                'items__product__category',
-                'items__variant',
-                'items__education_tablet'
-            ).get_or_create(user=request.user)
-        else:
-            session_key = request.session.session_key
-            if not session_key:
-                request.session.create()
-                session_key = request.session.session_key
-            cart, _ = Cart.objects.prefetch_related(
-                'items__product__brand',
-                'items__product__category',
-                'items__variant',
-                'items__education_tablet'
-            ).get_or_create(session_key=session_key, user=None)
-        return cart
+            cart, _ = cart_queryset().get_or_create(user=request.user)
+            return cart
+        # Guests keep their cart in the session until login or checkout
+        return GuestCart(request.session)
     
     def get(self, request):
         cart = self.get_cart(request)
+        if isinstance(cart, GuestCart):
+            return Response(GuestCartSerializer(cart).data)
         serializer = CartSerializer(cart)
         return Response(serializer.data)
     
@@ -552,21 +728,11 @@ class CartView(APIView):
                 if 'education_tablet_id' in serializer.validated_data:
                     tablet = get_object_or_404(EducationTablet, id=serializer.validated_data['education_tablet_id'])
                     
-                    # Check if tablet already in cart
-                    cart_item = CartItem.objects.filter(
-                        cart=cart,
-                        education_tablet=tablet
-                    ).first()
+                    if isinstance(cart, GuestCart):
+                        cart.add(tablet_id=tablet.id, quantity=quantity)
+                        return Response(serialize_cart(cart), status=status.HTTP_201_CREATED)
                     
-                    if cart_item:
-                        cart_item.quantity += quantity
-                        cart_item.save()
-                    else:
-                        CartItem.objects.create(
-                            cart=cart,
-                            education_tablet=tablet,
-                            quantity=quantity
-                        )
+                    CartItem.objects.add(cart, education_tablet_id=tablet.id, quantity=quantity)
                 else:
                     product = get_object_or_404(Product, id=serializer.validated_data['product_id'])
                     variant = None
@@ -574,19 +740,15 @@ class CartView(APIView):
                     if variant_id:
                         variant = get_object_or_404(ProductVariant, id=variant_id)
                     
-                    cart_item, created = CartItem.objects.get_or_create(
-                        cart=cart,
-                        product=product,
-                        variant=variant,
-                        education_tablet=None,
-                        defaults={'quantity': quantity}
-                    )
+                    if isinstance(cart, GuestCart):
+                        cart.add(product_id=product.id, variant_id=variant and variant.id, quantity=quantity)
+                        return Response(serialize_cart(cart), status=status.HTTP_201_CREATED)
                     
-                    if not created:
-                        cart_item.quantity += quantity
-                        cart_item.save()
+                    CartItem.objects.add(
+                        cart, product_id=product.id, variant_id=variant and variant.id, quantity=quantity
+                    )
                 
-                return Response(CartSerializer(cart).data, status=status.HTTP_201_CREATED)
+                return Response(serialize_cart(cart), status=status.HTTP_201_CREATED)
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             print(f"Cart error: {str(e)}")
@@ -597,7 +759,10 @@ class CartView(APIView):
     def delete(self, request):
         """Clear cart"""
         cart = self.get_cart(request)
-        cart.items.all().delete()
+        if isinstance(cart, GuestCart):
+            cart.clear()
+        else:
+            cart.items.all().delete()
         return Response({'message': 'Cart cleared'})
 
 
@@ -609,49 +774,69 @@ class CartItemView(APIView):
     
     def get_cart(self, request):
         if request.user.is_authenticated:
-            cart, _ = Cart.objects.select_related('user').prefetch_related(
-                'items__product__brand',
-                'items__product__category',
-                'items__variant',
-                'items__education_tablet'
-            ).get_or_create(user=request.user)
-        else:
-            session_key = request.session.session_key
-            cart = Cart.objects.prefetch_related(
-                'items__product__brand',
-                'items__product__category',
-                'items__variant',
-                'items__education_tablet'
-            ).filter(session_key=session_key, user=None).first()
-        return cart
+            cart, _ = Cart.objects.get_or_create(user=request.user)
+            return cart
+        return GuestCart(request.session)
     
     def patch(self, request, item_id):
         """Update cart item quantity"""
+        serializer = CartItemUpdateSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        quantity = serializer.validated_data['quantity']
         cart = self.get_cart(request)
-        if not cart:
-            return Response({'error': 'Cart not found'}, status=status.HTTP_404_NOT_FOUND)
         
-        cart_item = get_object_or_404(CartItem, id=item_id, cart=cart)
-        quantity = request.data.get('quantity', 1)
+        if isinstance(cart, GuestCart):
+            if not cart.set_quantity(item_id, quantity):
+                raise Http404
+            return Response(serialize_cart(cart))
         
-        if quantity <= 0:
-            cart_item.delete()
-        else:
-            cart_item.quantity = quantity
-            cart_item.save()
+        # Write the new quantity directly instead of read-modify-write
+        cart_items = CartItem.objects.filter(id=item_id, cart=cart)
+        changed = cart_items.delete()[0] if quantity <= 0 else cart_items.update(quantity=quantity)
+        if not changed:
+            raise Http404
         
-        return Response(CartSerializer(cart).data)
+        return Response(serialize_cart(cart))
     
     def delete(self, request, item_id):
         """Remove item from cart"""
         cart = self.get_cart(request)
-        if not cart:
-            return Response({'error': 'Cart not found'}, status=status.HTTP_404_NOT_FOUND)
+        if isinstance(cart, GuestCart):
+            if not cart.remove(item_id):
+                raise Http404
+            return Response(serialize_cart(cart))
         
-        cart_item = get_object_or_404(CartItem, id=item_id, cart=cart)
-        cart_item.delete()
+        if not CartItem.objects.filter(id=item_id, cart=cart).delete()[0]:
+            raise Http404
         
-        return Response(CartSerializer(cart).data)
+        return Response(serialize_cart(cart))
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class CartBulkView(APIView):
+    """
+    Apply several cart changes in one request and return the cart once:
+    {"operations": [{"op": "add", "product_id": 1, "quantity": 2},
+                    {"op": "set", "item_id": 5, "quantity": 3},
+                    {"op": "remove", "item_id": 6}]}
+    Either every operation is applied or (on a 400) none is.
+    """
+    permission_classes = [AllowAny]
+    authentication_classes = [TokenAuthentication]
+    
+    def get_cart(self, request):
+        if request.user.is_authenticated:
+            cart, _ = Cart.objects.get_or_create(user=request.user)
+            return cart
+        return GuestCart(request.session)
+    
+    def post(self, request):
+        serializer = CartBulkSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        cart = self.get_cart(request)
+        apply_operations(cart, serializer.validated_data['operations'])
+        return Response(serialize_cart(cart))
 
 
 # ============ ORDER VIEWS ============
@@ -660,16 +845,23 @@ class OrderViewSet(viewsets.ModelViewSet):
     """Handle orders"""
     queryset = Order.objects.all()
     lookup_field = 'order_id'
+    pagination_class = PageOrCursorPagination
     authentication_classes = [TokenAuthentication]
     throttle_classes = [SensitiveOperationThrottle]
     
     def get_serializer_class(self):
         if self.action == 'create':
             return OrderCreateSerializer
+        return self.read_serializer_class()
+    
+    def read_serializer_class(self):
+        """Summaries for the list unless ?expand=items asks for the full lines"""
+        if self.action == 'list' and 'items' not in self.request.query_params.get('expand', '').split(','):
+            return OrderSummarySerializer
         return OrderSerializer
     
     def get_permissions(self):
-        if self.action == 'create':
+        if self.action in ['create', 'reserve']:
             return [AllowAny()]
         if self.action in ['destroy', 'update', 'partial_update']:
             return [IsOwnerOrAdmin()]
@@ -677,12 +869,12 @@ class OrderViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         """Users can only see their own orders, admins see all"""
-        # OPTIMIZATION: Prefetch order items with related products to avoid N+1 queries
-        queryset = Order.objects.prefetch_related(
-            'items__product__brand',
-            'items__variant',
-            'items__education_tablet'
-        ).select_related('user')
+        # OPTIMIZATION: Prefetch only what the action's serializer reads (thumbnails for
+        # the list, full lines otherwise) to avoid N+1 queries.
+        # user is needed by IsOwnerOrAdmin, created_at by cursor pagination
+        queryset = plan_queryset(
+            Order.objects.order_by('-created_at'), self.read_serializer_class(), extra_fields=['user__id', 'created_at']
+        )
         
         if self.request.user.is_staff or self.request.user.is_superuser:
             return queryset
@@ -690,6 +882,46 @@ class OrderViewSet(viewsets.ModelViewSet):
             return queryset.filter(user=self.request.user)
         return Order.objects.none()
     
+    def checkout_lines(self, request, guest_cart=None):
+        """The shopper's cart (None for guests) and its priced lines"""
+        if guest_cart is not None:
+            # Guest carts go straight from the session to the order
+            return None, guest_cart.items
+        # Lock the cart row so a concurrent checkout of the same cart waits
+        cart = Cart.objects.select_for_update().filter(user=request.user).first()
+        return cart, list(cart.items.with_prices().order_by('pk')) if cart else []
+    
+    def empty_cart_response(self):
+        return Response({
+            'success': False,
+            'error': {'code': 'EMPTY_CART', 'message': 'Cart is empty'}
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    def out_of_stock_response(self, error):
+        return Response({
+            'success': False,
+            'error': {
+                'code': 'OUT_OF_STOCK',
+                'message': 'Some items are not available in the requested quantity',
+                'items': [line.id for line in error.lines],
+            }
+        }, status=status.HTTP_409_CONFLICT)
+    
+    @action(detail=False, methods=['post'])
+    def reserve(self, request):
+        """Hold stock for every cart line while the shopper completes checkout"""
+        guest_cart = None if request.user.is_authenticated else GuestCart(request.session)
+        try:
+            with transaction.atomic():
+                _, lines = self.checkout_lines(request, guest_cart)
+                if not lines:
+                    return self.empty_cart_response()
+                expires_at = inventory.place_holds(inventory.holder_for(request), lines)
+        except inventory.OutOfStock as error:
+            return self.out_of_stock_response(error)
+        return Response({'success': True, 'data': {'expires_at': expires_at}})
+    
+    @idempotent
     def create(self, request):
         """Create order from cart"""
         serializer = OrderCreateSerializer(data=request.data)
@@ -700,40 +932,43 @@ class OrderViewSet(viewsets.ModelViewSet):
                 'error': {'code': 'VALIDATION_ERROR', 'details': serializer.errors}
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Get cart
-        if request.user.is_authenticated:
-            cart = Cart.objects.filter(user=request.user).first()
-        else:
-            session_key = request.session.session_key
-            cart = Cart.objects.filter(session_key=session_key, user=None).first()
-        
-        if not cart or cart.items.count() == 0:
-            return Response({
-                'success': False,
-                'error': {'code': 'EMPTY_CART', 'message': 'Cart is empty'}
-            }, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Create order
         user = request.user if request.user.is_authenticated else None
-        order = serializer.save(
-            user=user,
-            subtotal=cart.total,
-            total=cart.total  # TODO: Add shipping calculation
-        )
+        guest_cart = None if user else GuestCart(request.session)
         
-        # Create order items
-        for cart_item in cart.items.all():
-            OrderItem.objects.create(
-                order=order,
-                product=cart_item.product,
-                variant=cart_item.variant,
-                education_tablet=cart_item.education_tablet,
-                quantity=cart_item.quantity,
-                unit_price=cart_item.unit_price
-            )
-        
-        # Clear cart
-        cart.items.all().delete()
+        # Price, take stock, write and clear in one transaction: a failure leaves
+        # no partial order, no stock taken and the cart as it was
+        try:
+            with transaction.atomic():
+                cart, lines = self.checkout_lines(request, guest_cart)
+                if not lines:
+                    return self.empty_cart_response()
+                
+                inventory.commit_stock(inventory.holder_for(request), lines)
+                subtotal = sum(line.line_total for line in lines)
+                order = serializer.save(
+                    user=user,
+                    subtotal=subtotal,
+                    total=subtotal  # TODO: Add shipping calculation
+                )
+                OrderItem.objects.bulk_create([
+                    OrderItem(
+                        order=order,
+                        product_id=line.product_id,
+                        variant_id=line.variant_id,
+                        education_tablet_id=line.education_tablet_id,
+                        quantity=line.quantity,
+                        unit_price=line.line_unit_price
+                    )
+                    for line in lines
+                ])
+                
+                # Clear cart
+                if cart is not None:
+                    cart.items.all().delete()
+        except inventory.OutOfStock as error:
+            return self.out_of_stock_response(error)
+        if guest_cart is not None:
+            guest_cart.clear()
         
         security_logger.info(
             f"Order {order.order_id} created by user {user.id if user else 'anonymous'} from IP {get_client_ip(request)}"
@@ -742,6 +977,7 @@ class OrderViewSet(viewsets.ModelViewSet):
         # TODO: Send confirmation emails
         # TODO: Integrate with DHL API
         
+        order = plan_queryset(Order.objects.filter(pk=order.pk), OrderSerializer).get()
         return Response({
             'success': True,
             'data': OrderSerializer(order).data
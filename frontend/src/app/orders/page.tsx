@@ -5,7 +5,7 @@ import Link from 'next/link';
 import Image from 'next/image';
 import { useRouter } from 'next/navigation';
 import { useStore } from '@/lib/store-context';
-import { ordersAPI, Order } from '@/lib/api';
+import { ordersAPI, Order, OrderSummary } from '@/lib/api';
 import { ArrowLeftIcon, ShoppingBagIcon, TruckIcon, CheckCircleIcon, ClockIcon } from '@heroicons/react/24/outline';
 
 // Helper function to get full image URL
@@ -46,7 +46,9 @@ const getStatusIcon = (status: string) => {
 export default function OrdersPage() {
   const router = useRouter();
   const { isAuthenticated, token } = useStore();
-  const [orders, setOrders] = useState<Order[]>([]);
+  const [orders, setOrders] = useState<OrderSummary[]>([]);
+  const [details, setDetails] = useState<Record<string, Order>>({});
+  const [loadingDetails, setLoadingDetails] = useState<string | null>(null);
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
@@ -70,6 +72,20 @@ export default function OrdersPage() {
     fetchOrders();
   }, [isAuthenticated, token, router]);
 
+  // The list only has thumbnails; fetch an order's lines when they are asked for
+  const showItems = async (orderId: string) => {
+    if (!token || details[orderId]) return;
+    setLoadingDetails(orderId);
+    try {
+      const order = await ordersAPI.get(orderId, token);
+      setDetails(prev => ({ ...prev, [orderId]: order }));
+    } catch (error) {
+      console.error('Error fetching order:', error);
+    } finally {
+      setLoadingDetails(null);
+    }
+  };
+
   if (loading) {
     return (
       <div className="min-h-screen bg-gray-50">
@@ -148,37 +164,73 @@ export default function OrdersPage() {
 
                 {/* Order Items */}
                 <div className="p-6">
-                  <div className="space-y-4">
-                    {order.items?.map((item) => (
-                      <div key={item.id} className="flex gap-4">
-                        <div className="w-16 h-16 bg-gray-100 rounded-lg overflow-hidden flex-shrink-0">
-                          {item.product?.image && (
-                            <Image
-                              src={getImageUrl(item.product.image) || '/placeholder.png'}
-                              alt={item.product?.name || 'Product'}
-                              width={64}
-                              height={64}
-                              className="w-full h-full object-cover"
-                            />
-                          )}
-                        </div>
-                        <div className="flex-1 min-w-0">
-                          <p className="font-medium text-gray-900 truncate">
-                            {item.product?.name || 'Product'}
-                          </p>
-                          {item.variant && (
-                            <p className="text-sm text-gray-500">{item.variant.name}</p>
-                          )}
-                          <p className="text-sm text-gray-500">Qty: {item.quantity}</p>
-                        </div>
-                        <div className="text-right">
-                          <p className="font-semibold text-gray-900">
-                            Ksh {parseFloat(item.total_price).toLocaleString()}
-                          </p>
+                  {details[order.order_id] ? (
+                    <div className="space-y-4">
+                      {details[order.order_id].items.map((item) => (
+                        <div key={item.id} className="flex gap-4">
+                          <div className="w-16 h-16 bg-gray-100 rounded-lg overflow-hidden flex-shrink-0">
+                            {item.product?.image && (
+                              <Image
+                                src={getImageUrl(item.product.image) || '/placeholder.png'}
+                                alt={item.product?.name || 'Product'}
+                                width={64}
+                                height={64}
+                                className="w-full h-full object-cover"
+                              />
+                            )}
+                          </div>
+                          <div className="flex-1 min-w-0">
+                            <p className="font-medium text-gray-900 truncate">
+                              {item.product?.name || 'Product'}
+                            </p>
+                            {item.variant && (
+                              <p className="text-sm text-gray-500">{item.variant.name}</p>
+                            )}
+                            <p className="text-sm text-gray-500">Qty: {item.quantity}</p>
+                          </div>
+                          <div className="text-right">
+                            <p className="font-semibold text-gray-900">
+                              Ksh {parseFloat(item.total_price).toLocaleString()}
+                            </p>
+                          </div>
                         </div>
+                      ))}
+                    </div>
+                  ) : (
+                    <div className="flex items-center gap-4">
+                      <div className="flex -space-x-3">
+                        {order.thumbnails.map((thumbnail, index) => (
+                          <div
+                            key={index}
+                            className="w-16 h-16 bg-gray-100 rounded-lg overflow-hidden flex-shrink-0 ring-2 ring-white"
+                          >
+                            {thumbnail.image && (
+                              <Image
+                                src={getImageUrl(thumbnail.image) || '/placeholder.png'}
+                                alt={thumbnail.name}
+                                width={64}
+                                height={64}
+                                className="w-full h-full object-cover"
+                              />
+                            )}
+                          </div>
+                        ))}
                       </div>
-                    ))}
-                  </div>
+                      <div className="flex-1 min-w-0">
+                        <p className="text-sm text-gray-500">
+                          {order.item_count} {order.item_count === 1 ? 'item' : 'items'}
+                        </p>
+                        <button
+                          type="button"
+                          onClick={() => showItems(order.order_id)}
+                          disabled={loadingDetails === order.order_id}
+                          className="text-sm font-medium text-blue-600 hover:text-blue-700 disabled:text-gray-400"
+                        >
+                          {loadingDetails === order.order_id ? 'Loading…' : 'View items'}
+                        </button>
+                      </div>
+                    </div>
+                  )}
 
                   {/* Order Total */}
                   <div className="mt-4 pt-4 border-t border-gray-100 flex justify-between items-center">
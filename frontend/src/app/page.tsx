@@ -350,83 +350,33 @@ export default function HomePage() {
     };
   }>>([]);
 
-  // Fetch hero slides from API
+  // Hero slides, shop/MSME products and enterprise bundles come from one cached endpoint
   useEffect(() => {
-    const fetchSlides = async () => {
+    const fetchHome = async () => {
       try {
-        const res = await fetch(`${process.env.NEXT_PUBLIC_API_URL}/hero-slides/`);
+        const res = await fetch(`${process.env.NEXT_PUBLIC_API_URL}/home/`);
         if (res.ok) {
           const data = await res.json();
-          // Handle paginated response (data.results) or direct array
-          const slides = data.results || data;
-          if (slides && slides.length > 0) {
-            setHeroSlides(slides);
+          if (data.hero_slides && data.hero_slides.length > 0) {
+            setHeroSlides(data.hero_slides);
           }
-        }
-      } catch (error) {
-        console.log('Using fallback slides');
-      } finally {
-        setIsLoading(false);
-      }
-    };
-    fetchSlides();
-  }, []);
-
-  // Fetch shop products
-  useEffect(() => {
-    const fetchShopProducts = async () => {
-      try {
-        const res = await fetch(`${process.env.NEXT_PUBLIC_API_URL}/products/?type=shop`);
-        if (res.ok) {
-          const data = await res.json();
-          const products = data.results || data;
-          if (products && products.length > 0) {
-            setShopProducts(products.slice(0, 4)); // Show first 4 products
+          if (data.shop_products && data.shop_products.length > 0) {
+            setShopProducts(data.shop_products.slice(0, 4)); // Show first 4 products
           }
-        }
-      } catch (error) {
-        console.log('Error fetching shop products');
-      }
-    };
-    fetchShopProducts();
-  }, []);
-
-  // Fetch MSME products
-  useEffect(() => {
-    const fetchMsmeProducts = async () => {
-      try {
-        const res = await fetch(`${process.env.NEXT_PUBLIC_API_URL}/products/?type=msme`);
-        if (res.ok) {
-          const data = await res.json();
-          const products = data.results || data;
-          if (products && products.length > 0) {
-            setMsmeProducts(products.slice(0, 4)); // Show first 4 products
+          if (data.msme_products && data.msme_products.length > 0) {
+            setMsmeProducts(data.msme_products.slice(0, 4)); // Show first 4 products
           }
-        }
-      } catch (error) {
-        console.log('Error fetching MSME products');
-      }
-    };
-    fetchMsmeProducts();
-  }, []);
-
-  // Fetch enterprise bundles
-  useEffect(() => {
-    const fetchEnterpriseBundles = async () => {
-      try {
-        const res = await fetch(`${process.env.NEXT_PUBLIC_API_URL}/enterprise/bundles/`);
-        if (res.ok) {
-          const data = await res.json();
-          const bundles = data.results || data;
-          if (bundles && bundles.length > 0) {
-            setEnterpriseBundles(bundles); // Show all bundles
+          if (data.enterprise_bundles && data.enterprise_bundles.length > 0) {
+            setEnterpriseBundles(data.enterprise_bundles); // Show all bundles
           }
         }
       } catch (error) {
-        console.log('Error fetching enterprise bundles');
+        console.log('Using fallback homepage content');
+      } finally {
+        setIsLoading(false);
       }
     };
-    fetchEnterpriseBundles();
+    fetchHome();
   }, []);
 
   useEffect(() => {
@@ -2,10 +2,12 @@ const API_BASE_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000/a
 
 interface FetchOptions extends RequestInit {
   token?: string;
+  // Sent as Idempotency-Key: retries with the same key are answered with the first response
+  idempotencyKey?: string;
 }
 
 async function fetchAPI<T>(endpoint: string, options: FetchOptions = {}): Promise<T> {
-  const { token, ...fetchOptions } = options;
+  const { token, idempotencyKey, ...fetchOptions } = options;
   
   const headers: Record<string, string> = {
     'Content-Type': 'application/json',
@@ -14,6 +16,9 @@ async function fetchAPI<T>(endpoint: string, options: FetchOptions = {}): Promis
   if (token) {
     headers['Authorization'] = `Token ${token}`;
   }
+  if (idempotencyKey) {
+    headers['Idempotency-Key'] = idempotencyKey;
+  }
 
   const response = await fetch(`${API_BASE_URL}${endpoint}`, {
     ...fetchOptions,
@@ -103,6 +108,8 @@ export const productsAPI = {
   },
   getBySlug: (slug: string) => fetchAPI<Product>(`/products/${slug}/`),
   getByType: (type: string) => fetchAPI<{ results: Product[]; count: number }>(`/products/?type=${type}`),
+  getByIds: (ids: number[]) => fetchAPI<Product[]>(`/products/batch/?ids=${ids.join(',')}`),
+  getBySlugs: (slugs: string[]) => fetchAPI<Product[]>(`/products/batch/?slugs=${slugs.join(',')}`),
 };
 
 export const categoriesAPI = {
@@ -316,10 +323,11 @@ export const educationAPI = {
       body: JSON.stringify(data),
       token,
     }),
-  donate: (shareLink: string, data: Record<string, unknown>) =>
+  donate: (shareLink: string, data: Record<string, unknown>, idempotencyKey?: string) =>
     fetchAPI<Donation>(`/education/fundraisers/${shareLink}/donate/`, {
       method: 'POST',
       body: JSON.stringify(data),
+      idempotencyKey,
     }),
   getTablets: (params?: Record<string, string>) => {
     const query = params ? `?${new URLSearchParams(params).toString()}` : '';
@@ -347,13 +355,18 @@ export interface CartItem {
 }
 
 export interface Cart {
-  id: number;
-  cart_id: string;
+  id: number | null; // null for guest carts, which live in the session
+  cart_id: string | null;
   items: CartItem[];
   total: string;
   item_count: number;
 }
 
+export type CartOperation =
+  | { op: 'add'; product_id?: number; variant_id?: number; education_tablet_id?: number; quantity?: number }
+  | { op: 'set'; item_id: number; quantity: number }
+  | { op: 'remove'; item_id: number };
+
 export const cartAPI = {
   get: (token?: string) => fetchAPI<Cart>('/cart/', { token }),
   addItem: (productId: number, variantId?: number, quantity = 1, token?: string) =>
@@ -379,6 +392,12 @@ export const cartAPI = {
       method: 'DELETE',
       token,
     }),
+  bulkUpdate: (operations: CartOperation[], token?: string) =>
+    fetchAPI<Cart>('/cart/bulk/', {
+      method: 'POST',
+      body: JSON.stringify({ operations }),
+      token,
+    }),
   clear: (token?: string) => fetchAPI<{ message: string }>('/cart/', { method: 'DELETE', token }),
 };
 
@@ -411,15 +430,40 @@ export interface Order {
   created_at: string;
 }
 
+export interface OrderThumbnail {
+  name: string;
+  image: string | null;
+}
+
+// Order list rows: a few thumbnails instead of the lines (ordersAPI.get returns the full order)
+export interface OrderSummary {
+  id: number;
+  order_id: string;
+  town: string;
+  subtotal: string;
+  shipping_cost: string;
+  total: string;
+  status: string;
+  payment_status: string;
+  tracking_number: string;
+  item_count: number;
+  thumbnails: OrderThumbnail[];
+  created_at: string;
+}
+
 export const ordersAPI = {
-  create: (data: Record<string, unknown>, token?: string) =>
+  // Hold stock for the cart while checkout is completed; 409 OUT_OF_STOCK lists the cart item ids that are short
+  reserve: (token?: string) =>
+    fetchAPI<{ success: boolean; data: { expires_at: string } }>('/orders/reserve/', { method: 'POST', token }),
+  create: (data: Record<string, unknown>, token?: string, idempotencyKey?: string) =>
     fetchAPI<Order>('/orders/', {
       method: 'POST',
       body: JSON.stringify(data),
       token,
+      idempotencyKey,
     }),
   getAll: (token: string) =>
-    fetchAPI<{ results: Order[] }>('/orders/', { token }),
+    fetchAPI<{ results: OrderSummary[] }>('/orders/', { token }),
   get: (orderId: string, token: string) =>
     fetchAPI<Order>(`/orders/${orderId}/`, { token }),
 };